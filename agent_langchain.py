@@ -3,11 +3,17 @@ Agente LangChain (ReAct) usando Gemini como LLM.
 Conecta as tools existentes via LangChain Tools e executa o loop ReAct.
 """
 
+import contextvars
+import copy
 import os
-from typing import Callable, Dict, Any, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 from langchain_core.tools import Tool
 from langchain_core.messages import (
+    AIMessage,
     HumanMessage,
     SystemMessage,
     ToolMessage,
@@ -15,9 +21,22 @@ from langchain_core.messages import (
 import json
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from resposta_template import renderizar_resposta_template
+from sessoes import Sessao, obter_armazem_sessoes
+from tools import perfil
+from tools.metricas import BUCKETS_CONTAGEM, REGISTRO
+from tools.prazo import PrazoEsgotadoError, limite_atual, prazo, tempo_restante
+
 
 GEMINI_MODEL_NAME = "gemini-flash-lite-latest"
 
+# Timeout máximo de cada requisição ao Gemini
+TIMEOUT_LLM = 120
+
+
+class LLMIndisponivelError(Exception):
+    """Falha do LLM (ex: 429, 503) numa requisição com prazo: a resposta vira o template local."""
+
 
 SYSTEM_INSTRUCTION = (
     "Você é um consultor sênior de carreira em TI.\n\n"
@@ -57,6 +76,109 @@ SYSTEM_INSTRUCTION = (
 )
 
 
+# Instrução enxuta para turnos de follow-up: os dados já vêm no contexto
+SYSTEM_INSTRUCTION_FOLLOW_UP = (
+    "Você é um consultor sênior de carreira em TI continuando uma conversa.\n"
+    "Os resultados das ferramentas já foram coletados e estão abaixo.\n"
+    "Só chame uma ferramenta se a pergunta exigir dados que NÃO estão abaixo "
+    "(ex: outra área ou outra tecnologia); caso contrário, responda direto.\n"
+    "NUNCA invente números ou dados. Use apenas os resultados fornecidos.\n"
+    "Sua resposta DEVE ter EXATAMENTE 5 bullets objetivos, cada um citando a fonte: "
+    "\"fonte: Google Jobs via SerpAPI\" ou \"fonte: Páginas oficiais (AWS/Microsoft/Google Cloud)\"."
+)
+
+SYSTEM_INSTRUCTION_COMPARACAO = (
+    "Você é um consultor sênior de carreira em TI comparando áreas entre si.\n"
+    "Os resultados das ferramentas de TODAS as áreas já foram coletados e estão abaixo; NÃO há ferramentas disponíveis.\n"
+    "NUNCA invente números ou dados. Use apenas os resultados fornecidos; se uma área tiver erro, "
+    "diga que os dados dela estão indisponíveis.\n"
+    "Compare as áreas (demanda, salários, empresas, certificações e skills) e termine recomendando em qual focar.\n"
+    "Sua resposta DEVE ter EXATAMENTE 5 bullets objetivos e comparativos, cada um citando a fonte: "
+    "\"fonte: Google Jobs via SerpAPI\" ou \"fonte: Páginas oficiais (AWS/Microsoft/Google Cloud)\"."
+)
+
+
+# Threads para as tools do modo comparação (coleta concorrente)
+_executor_tools = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tools-comparacao")
+
+
+_llm_chamadas = REGISTRO.contador("llm_chamadas_total", "Chamadas ao Gemini por resultado", ("resultado",))
+_llm_latencia = REGISTRO.histograma("llm_latencia_segundos", "Latência de cada turno do Gemini em segundos")
+_llm_tokens = REGISTRO.contador("llm_tokens_total", "Tokens do Gemini por tipo (entrada/saida)", ("tipo",))
+_consultas = REGISTRO.contador(
+    "agente_consultas_total", "Consultas ao agente por modo (react/follow_up/comparacao) e degradação",
+    ("modo", "degradado")
+)
+_chamadas_por_consulta = REGISTRO.histograma(
+    "agente_llm_chamadas_por_consulta", "Chamadas ao Gemini por consulta", buckets=BUCKETS_CONTAGEM
+)
+_tokens_por_consulta = REGISTRO.histograma(
+    "agente_llm_tokens_por_consulta", "Tokens do Gemini por consulta", buckets=BUCKETS_CONTAGEM
+)
+
+
+def _invocar_com_prazo(modelo: Any, messages: List[Any], limite: Optional[float]) -> Any:
+    """
+    Invoca o modelo com timeout de requisição = tempo_restante(TIMEOUT_LLM).
+    O prazo é `limite` (time.monotonic) ou, se None, o do contexto; com prazo,
+    a chamada é feita numa única tentativa e qualquer falha vira
+    PrazoEsgotadoError (timeout) ou LLMIndisponivelError (demais erros).
+    Roda na thread de quem invoca: nada fica rodando em background após o prazo.
+    """
+    limite = limite if limite is not None else limite_atual()
+    with prazo(limite):
+        timeout = tempo_restante(TIMEOUT_LLM)
+    # O cliente converte o timeout para ms inteiros; abaixo de 1 ms viraria "sem timeout"
+    if timeout < 0.001:
+        raise PrazoEsgotadoError("prazo esgotado antes da chamada ao LLM")
+    opcoes: Dict[str, Any] = {"timeout": timeout}
+    if limite is not None:
+        # Sem retentativas: cada tentativa reiniciaria o timeout além do prazo
+        opcoes["max_retries"] = 1
+    try:
+        with perfil.etapa("turno do LLM"):
+            return modelo.invoke(messages, **opcoes)
+    except Exception as e:
+        esgotado = limite is not None and time.monotonic() >= limite
+        if esgotado or (limite is not None and "timeout" in type(e).__name__.lower()):
+            raise PrazoEsgotadoError(f"LLM não respondeu em {timeout:.1f}s") from e
+        if limite is not None:
+            # Com prazo não há nova tentativa: a resposta garantida sai do template
+            raise LLMIndisponivelError(f"{type(e).__name__}: {e}") from e
+        raise
+
+
+def _chamar_llm(
+    modelo: Any, messages: List[Any], limite: Optional[float], uso: Optional[Dict[str, int]] = None
+) -> Any:
+    """Chamada ao LLM com prazo e métricas; acumula chamadas/tokens da consulta em `uso`."""
+    inicio = time.perf_counter()
+    try:
+        response = _invocar_com_prazo(modelo, messages, limite)
+    except PrazoEsgotadoError:
+        _llm_chamadas.inc("prazo")
+        raise
+    except Exception:
+        _llm_chamadas.inc("erro")
+        raise
+    finally:
+        _llm_latencia.observar(time.perf_counter() - inicio)
+    _llm_chamadas.inc("ok")
+
+    tokens = getattr(response, "usage_metadata", None) or {}
+    _llm_tokens.inc("entrada", quantidade=tokens.get("input_tokens", 0))
+    _llm_tokens.inc("saida", quantidade=tokens.get("output_tokens", 0))
+    if uso is not None:
+        uso["chamadas"] = uso.get("chamadas", 0) + 1
+        uso["tokens"] = uso.get("tokens", 0) + tokens.get("total_tokens", 0)
+    return response
+
+
+def _avisar_degradacao(e: Exception) -> None:
+    motivo = "Prazo da requisição" if isinstance(e, PrazoEsgotadoError) else "LLM indisponível"
+    print(f"\n[AGENT] ⏱ {motivo}: {e}. Respondendo com template local (degradado)")
+
+
 def _build_tools(tool_router: Dict[str, Callable[..., Any]]) -> List[Tool]:
     """Cria a lista de LangChain Tools a partir do router existente."""
     tools: List[Tool] = []
@@ -89,134 +211,464 @@ def _build_tools(tool_router: Dict[str, Callable[..., Any]]) -> List[Tool]:
     return tools
 
 
-def make_agent(tool_router: Dict[str, Callable[..., Any]]) -> Any:
+class LCReActExecutor:
     """
-    Cria um AgentExecutor ReAct com Gemini, pronto para `invoke({"input": ...})`.
+    Executor leve que roda o loop de tool calling manualmente.
+    
+    Não guarda estado por requisição (sessão, resultados e prazo vivem em
+    `invoke`), então uma mesma instância atende chamadas concorrentes.
     """
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY não configurada no .env")
 
-    model_name = os.getenv("GEMINI_MODEL_NAME", GEMINI_MODEL_NAME)
-    llm = ChatGoogleGenerativeAI(model=model_name, temperature=0.2)
+    def __init__(
+        self,
+        llm_model: Any,
+        tools_list: List[Tool],
+        tool_router: Dict[str, Callable[..., Any]],
+        sla: Optional[float] = None,
+    ):
+        self.llm = llm_model  # Armazena referência ao modelo original
+        self.llm_with_tools = llm_model.bind_tools(tools_list)
+        self.tool_router = tool_router
+        self.sla_segundos = sla
 
-    tools = _build_tools(tool_router)
+    def com_sla(self, sla: Optional[float]) -> "LCReActExecutor":
+        """Cópia rasa com outro SLA padrão, compartilhando modelo, tools e `bind_tools`."""
+        executor = copy.copy(self)
+        executor.sla_segundos = sla
+        return executor
 
-    # Retorna um executor leve que roda o loop de tool calling manualmente
-    class LCReActExecutor:
-        def __init__(self, llm_model: Any, tools_list: List[Tool]):
-            self.llm = llm_model  # Armazena referência ao modelo original
-            self.llm_with_tools = llm_model.bind_tools(tools_list)
+    def _rodar_chamada(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        resultados: Dict[str, Any],
+        sessao: Optional[Sessao],
+    ) -> Dict[str, Any]:
+        """Executa uma chamada de tool do LLM e registra o resultado na requisição/sessão."""
+        print(f"[AGENT] → Chamando tool: {name} com argumentos: {args}")
+        try:
+            with perfil.etapa(f"tool {name}"):
+                if name in self.tool_router:
+                    # Converte __arg1 para o nome correto do parâmetro
+                    if "__arg1" in args:
+                        if name == "analisar_demanda_salarial":
+                            # Para esta tool, __arg1 é area
+                            result = self.tool_router[name](area=args["__arg1"])
+                        elif name == "sugerir_certificacoes_tendencia":
+                            # Para esta tool, __arg1 é tecnologia
+                            result = self.tool_router[name](tecnologia=args["__arg1"])
+                        else:
+                            result = self.tool_router[name](**args)
+                    else:
+                        result = self.tool_router[name](**args)
+                    print(f"[AGENT] ✓ Tool {name} executada com sucesso")
+                else:
+                    result = {"error": {"status": "error", "message": f"Função {name} não implementada"}}
+                    print(f"[AGENT] ✗ Tool {name} não encontrada")
+        except Exception as e:
+            result = {"error": {"status": "error", "message": str(e)}}
+            print(f"[AGENT] ✗ Erro ao executar {name}: {e}")
 
-        def invoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-            user_input = inputs.get("input", "")
-            print("\n" + "=" * 70)
-            print("🤖 CHAIN OF THOUGHT")
-            print("=" * 70)
-            
-            messages = [
-                SystemMessage(content=SYSTEM_INSTRUCTION),
-                HumanMessage(content=user_input),
-            ]
+        if name in self.tool_router:
+            resultados[name] = {"args": args, "resultado": result}
+            if sessao is not None:
+                sessao.resultados_tools[name] = resultados[name]
+        return result
+
+    def _atualizar_sessao(
+        self,
+        sessao: Sessao,
+        resultados: Dict[str, Any],
+        area: Optional[str],
+        tecnologia: Optional[str],
+    ) -> None:
+        """
+        Antes do follow-up, refaz as tools cujo resultado guardado é erro ou
+        cujo argumento mudou (área/tecnologia informadas explicitamente).
+        """
+        pedidos = {"analisar_demanda_salarial": ("area", area), "sugerir_certificacoes_tendencia": ("tecnologia", tecnologia)}
+        for name, (parametro, valor) in pedidos.items():
+            registro = sessao.resultados_tools.get(name)
+            if registro is None:
+                continue
+            args = dict(registro.get("args") or {})
+            atual = args.get(parametro, args.get("__arg1"))
+            mudou = bool(valor) and str(atual or "").strip().lower() != valor.strip().lower()
+            if mudou:
+                args.pop("__arg1", None)
+                args[parametro] = valor
+            elif "error" not in registro.get("resultado", {}):
+                continue
+            motivo = f"{parametro} mudou para {valor!r}" if mudou else "resultado anterior com erro"
+            print(f"[AGENT] Sessão {sessao.session_id}: refazendo {name} ({motivo})")
+            self._rodar_chamada(name, args, resultados, sessao)
+
+    def _responder_com_sessao(
+        self,
+        user_input: str,
+        sessao: Sessao,
+        resultados: Dict[str, Any],
+        limite: Optional[float],
+        uso: Dict[str, int],
+        area: Optional[str] = None,
+        tecnologia: Optional[str] = None,
+    ) -> Any:
+        """
+        Follow-up com os resultados já coletados: uma chamada ao LLM quando eles
+        bastam. Resultados com erro ou de outra área/tecnologia são refeitos antes;
+        se a pergunta pedir dados novos, o LLM chama as tools e faz mais um turno.
+        """
+        self._atualizar_sessao(sessao, resultados, area, tecnologia)
+        print(f"\n[AGENT] Sessão {sessao.session_id}: reutilizando resultados de "
+              f"{', '.join(sessao.resultados_tools)}")
+        messages = [
+            SystemMessage(content=SYSTEM_INSTRUCTION_FOLLOW_UP),
+            SystemMessage(content="Resultados das ferramentas:\n" + json.dumps(
+                sessao.resultados_tools, ensure_ascii=False
+            )),
+            *sessao.historico,
+            HumanMessage(content=user_input),
+        ]
+        response = _chamar_llm(self.llm_with_tools, messages, limite, uso)
+        tool_calls = getattr(response, "tool_calls", None) or []
+        if not tool_calls:
+            return getattr(response, "content", "")
+
+        messages.append(response)
+        for call in tool_calls:
+            result = self._rodar_chamada(call.get("name"), call.get("args", {}), resultados, sessao)
+            with perfil.etapa("serializar ToolMessage"):
+                conteudo = json.dumps(result, ensure_ascii=False)
+            messages.append(ToolMessage(content=conteudo, tool_call_id=call.get("id")))
+        response = _chamar_llm(self.llm, messages, limite, uso)
+        return getattr(response, "content", "")
+
+    def invoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        user_input = inputs.get("input", "")
+        session_id = inputs.get("session_id")
+        sla = inputs.get("sla_segundos", self.sla_segundos)
+        limite = inputs.get("limite")
+        if limite is None and sla:
+            limite = time.monotonic() + sla
+        print("\n" + "=" * 70)
+        print("🤖 CHAIN OF THOUGHT")
+        print("=" * 70)
+        
+        sessao = obter_armazem_sessoes().carregar(session_id) if session_id else None
+        if sessao is None and session_id:
+            sessao = Sessao(session_id=session_id)
+        # Resultados das tools desta requisição (base da resposta de fallback)
+        resultados: Dict[str, Any] = dict(sessao.resultados_tools) if sessao is not None else {}
+        
+        degradado = False
+        follow_up = sessao is not None and bool(sessao.resultados_tools)
+        uso: Dict[str, int] = {"chamadas": 0, "tokens": 0}
+        try:
+            # Tools e chamadas HTTP leem o prazo do contexto
+            with prazo(limite):
+                if follow_up:
+                    final_text = self._responder_com_sessao(
+                        user_input, sessao, resultados, limite, uso,
+                        area=inputs.get("area"), tecnologia=inputs.get("tecnologia"),
+                    )
+                else:
+                    final_text = self._executar_react(user_input, sessao, resultados, limite, uso)
+            if limite is not None and not final_text:
+                raise PrazoEsgotadoError("LLM retornou resposta vazia")
+        except (PrazoEsgotadoError, LLMIndisponivelError) as e:
+            _avisar_degradacao(e)
+            with perfil.etapa("template local"):
+                final_text = renderizar_resposta_template(
+                    resultados, area=inputs.get("area"), tecnologia=inputs.get("tecnologia")
+                )
+            degradado = True
+        
+        _consultas.inc("follow_up" if follow_up else "react", str(degradado).lower())
+        _chamadas_por_consulta.observar(uso["chamadas"])
+        _tokens_por_consulta.observar(uso["tokens"])
+        print("=" * 70 + "\n")
+        return self._finalizar(final_text, user_input, sessao, degradado)
 
-            response = self.llm_with_tools.invoke(messages)
+    def _executar_react(
+        self,
+        user_input: str,
+        sessao: Optional[Sessao],
+        resultados: Dict[str, Any],
+        limite: Optional[float],
+        uso: Dict[str, int],
+    ) -> Any:
+        """Loop ReAct: tool calling até as duas tools rodarem, depois a resposta final."""
+        messages = [
+            SystemMessage(content=SYSTEM_INSTRUCTION),
+            HumanMessage(content=user_input),
+        ]
+
+        response = _chamar_llm(self.llm_with_tools, messages, limite, uso)
+        
+        # Mostra raciocínio inicial
+        initial_content = getattr(response, "content", "")
+        if initial_content:
+            print(f"\n[AGENT] Raciocínio inicial: {initial_content}")
+
+        max_iters = 3  # Reduzido para evitar loops
+        it = 0
+        tools_called = set()  # Registro de quais tools foram chamadas
+        expected_tools = {"analisar_demanda_salarial", "sugerir_certificacoes_tendencia"}
+        
+        while it < max_iters:
+            it += 1
+            tool_calls = getattr(response, "tool_calls", None) or []
             
-            # Mostra raciocínio inicial
-            initial_content = getattr(response, "content", "")
-            if initial_content:
-                print(f"\n[AGENT] Raciocínio inicial: {initial_content}")
-
-            max_iters = 3  # Reduzido para evitar loops
-            it = 0
-            tools_called = set()  # Registro de quais tools foram chamadas
-            expected_tools = {"analisar_demanda_salarial", "sugerir_certificacoes_tendencia"}
+            # Se não há tool calls E já chamamos tools, para o loop
+            if not tool_calls and tools_called:
+                # Mostra raciocínio final
+                final_content = getattr(response, "content", "")
+                if final_content:
+                    print(f"\n[AGENT] Raciocínio final: {final_content}")
+                break
             
-            while it < max_iters:
-                it += 1
-                tool_calls = getattr(response, "tool_calls", None) or []
-                
-                # Se não há tool calls E já chamamos tools, para o loop
-                if not tool_calls and tools_called:
-                    # Mostra raciocínio final
-                    final_content = getattr(response, "content", "")
-                    if final_content:
-                        print(f"\n[AGENT] Raciocínio final: {final_content}")
-                    break
-                
-                # Se não há tool calls mas também não chamamos tools ainda, é a primeira iteração
-                if not tool_calls:
-                    # Mostra raciocínio inicial
-                    initial_content = getattr(response, "content", "")
-                    if initial_content:
-                        print(f"\n[AGENT] {initial_content}")
-                    break
-
-                print(f"\n[ITERAÇÃO {it}]")
-                
-                for call in tool_calls:
-                    name = call.get("name")
-                    args = call.get("args", {})
-                    call_id = call.get("id")
-                    
-                    print(f"[AGENT] → Chamando tool: {name} com argumentos: {args}")
-
-                    try:
-                        if name in tool_router:
-                            # Converte __arg1 para o nome correto do parâmetro
-                            if "__arg1" in args:
-                                if name == "analisar_demanda_salarial":
-                                    # Para esta tool, __arg1 é area
-                                    result = tool_router[name](area=args["__arg1"])
-                                elif name == "sugerir_certificacoes_tendencia":
-                                    # Para esta tool, __arg1 é tecnologia
-                                    result = tool_router[name](tecnologia=args["__arg1"])
-                                else:
-                                    result = tool_router[name](**args)
-                            else:
-                                result = tool_router[name](**args)
-                            print(f"[AGENT] ✓ Tool {name} executada com sucesso")
-                        else:
-                            result = {"error": {"status": "error", "message": f"Função {name} não implementada"}}
-                            print(f"[AGENT] ✗ Tool {name} não encontrada")
-                    except Exception as e:
-                        result = {"error": {"status": "error", "message": str(e)}}
-                        print(f"[AGENT] ✗ Erro ao executar {name}: {e}")
-
-                    # Adiciona ao registro de tools chamadas
-                    if name in tool_router:
-                        tools_called.add(name)
-
-                    messages.append(
-                        ToolMessage(content=json.dumps(result, ensure_ascii=False), tool_call_id=call_id)
-                    )
+            # Se não há tool calls mas também não chamamos tools ainda, é a primeira iteração
+            if not tool_calls:
+                # Mostra raciocínio inicial
+                initial_content = getattr(response, "content", "")
+                if initial_content:
+                    print(f"\n[AGENT] {initial_content}")
+                break
+
+            print(f"\n[ITERAÇÃO {it}]")
+            
+            for call in tool_calls:
+                name = call.get("name")
+                call_id = call.get("id")
+                result = self._rodar_chamada(name, call.get("args", {}), resultados, sessao)
+
+                # Adiciona ao registro de tools chamadas
+                if name in self.tool_router:
+                    tools_called.add(name)
+
+                with perfil.etapa("serializar ToolMessage"):
+                    conteudo = json.dumps(result, ensure_ascii=False)
+                messages.append(ToolMessage(content=conteudo, tool_call_id=call_id))
 
-                response = self.llm_with_tools.invoke(messages)
-                
-                # Mostra raciocínio após receber os resultados das tools
-                thinking = getattr(response, "content", "")
-                if thinking:
-                    print(f"[AGENT] Após resultados: {thinking}")
-                
-                # Se chamamos as duas tools esperadas, força parada
-                if len(tools_called) >= 2:
-                    print(f"\n[AGENT] As duas tools foram chamadas. Forçando resposta final...")
-                    break
-
-            # Se saiu do loop mas ainda não tem resposta, faz uma última chamada sem tool_calls
-            if not getattr(response, "content", ""):
-                print(f"\n[AGENT] Gerando resposta final...")
-                # Cria um novo modelo SEM ferramentas para forçar resposta final
-                final_messages = messages + [HumanMessage(content="Baseado nos resultados das ferramentas, gere sua resposta final com 5 bullets objetivos citando as fontes.")]
-                response_final = self.llm.invoke(final_messages)
-                response = response_final
-
-            print("=" * 70 + "\n")
+            response = _chamar_llm(self.llm_with_tools, messages, limite, uso)
             
+            # Mostra raciocínio após receber os resultados das tools
+            thinking = getattr(response, "content", "")
+            if thinking:
+                print(f"[AGENT] Após resultados: {thinking}")
+            
+            # Se chamamos as duas tools esperadas, força parada
+            if len(tools_called) >= 2:
+                print(f"\n[AGENT] As duas tools foram chamadas. Forçando resposta final...")
+                break
+
+        # Se saiu do loop mas ainda não tem resposta, faz uma última chamada sem tool_calls
+        if not getattr(response, "content", ""):
+            print(f"\n[AGENT] Gerando resposta final...")
+            # Cria um novo modelo SEM ferramentas para forçar resposta final
+            final_messages = messages + [HumanMessage(content="Baseado nos resultados das ferramentas, gere sua resposta final com 5 bullets objetivos citando as fontes.")]
+            response_final = _chamar_llm(self.llm, final_messages, limite, uso)
+            response = response_final
+
+        return getattr(response, "content", "")
+
+    def _executar_tool(self, name: str, **kwargs: Any) -> Dict[str, Any]:
+        """Executa uma tool do router fora do loop ReAct; exceções viram {"error": ...}."""
+        with perfil.etapa(f"tool {name}"):
+            if name not in self.tool_router:
+                return {"error": {"status": "error", "message": f"Função {name} não implementada"}}
+            try:
+                return self.tool_router[name](**kwargs)
+            except PrazoEsgotadoError as e:
+                return {"error": {"status": "deadline_exceeded", "message": str(e)}}
+            except Exception as e:
+                return {"error": {"status": "error", "message": str(e)}}
+
+    def _coletar_comparacao(
+        self, areas: List[str], tecnologias: List[str], local: str, limite: Optional[float]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Roda as tools de todas as áreas em paralelo: demanda uma vez por área e
+        certificações uma vez por tecnologia distinta.
+        """
+        futuros = {}
+        for area in dict.fromkeys(areas):
+            # Cada thread recebe uma cópia do contexto atual (inclui o prazo)
+            ctx = contextvars.copy_context()
+            futuros[("demanda", area)] = _executor_tools.submit(
+                ctx.run, self._executar_tool, "analisar_demanda_salarial", area=area, local=local
+            )
+        for tecnologia in dict.fromkeys(tecnologias):
+            ctx = contextvars.copy_context()
+            futuros[("certs", tecnologia)] = _executor_tools.submit(
+                ctx.run, self._executar_tool, "sugerir_certificacoes_tendencia", tecnologia=tecnologia
+            )
+
+        demanda: Dict[str, Any] = {}
+        certs: Dict[str, Any] = {}
+        for (tipo, chave), futuro in futuros.items():
+            try:
+                restante = None if limite is None else max(0.0, limite - time.monotonic())
+                result = futuro.result(timeout=restante)
+            except FuturesTimeoutError:
+                # cancel() só evita tools que ainda estão na fila; as que já rodam
+                # terminam sozinhas, pois veem o mesmo prazo via contexto copiado
+                futuro.cancel()
+                result = {"error": {"status": "deadline_exceeded", "message": "prazo da requisição esgotado"}}
+            (demanda if tipo == "demanda" else certs)[chave] = result
+            status = "✗" if "error" in result else "✓"
+            print(f"[AGENT] {status} {'Demanda' if tipo == 'demanda' else 'Certificações'}: {chave}")
+        return demanda, certs
+
+    def comparar(
+        self,
+        areas: List[str],
+        tecnologias: Optional[List[str]] = None,
+        local: str = "Brasil",
+        limite: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Modo comparação: várias áreas respondidas numa única chamada ao LLM.
+
+        As tools de todas as áreas rodam em paralelo (sem tool calling), e um
+        só turno do Gemini gera o plano comparativo. Se o prazo estourar, o LLM
+        responder vazio ou (com prazo) falhar, a resposta é o template local de
+        cada área, marcada como degradada.
+
+        Args:
+            areas: áreas a comparar (ex: ["DevOps", "SRE", "Platform Engineer"])
+            tecnologias: uma tecnologia por área, ou uma só para todas (default: "Nuvem")
+            local: localização das vagas
+            limite: instante-limite (time.monotonic); default derivado do sla
+        """
+        if not areas:
+            raise ValueError("Informe ao menos uma área para comparar")
+        tecnologias = list(tecnologias or ["Nuvem"])
+        if len(tecnologias) == 1:
+            tecnologias = tecnologias * len(areas)
+        elif len(tecnologias) != len(areas):
+            raise ValueError("Informe uma tecnologia para todas as áreas ou uma por área")
+        if limite is None and self.sla_segundos:
+            limite = time.monotonic() + self.sla_segundos
+        print("\n" + "=" * 70)
+        print(f"🤖 COMPARAÇÃO: {' vs '.join(areas)}")
+        print("=" * 70)
+
+        uso: Dict[str, int] = {"chamadas": 0, "tokens": 0}
+        degradado = False
+        with prazo(limite):
+            demanda, certs = self._coletar_comparacao(areas, tecnologias, local, limite)
+        try:
+            with perfil.etapa("serializar resultados da comparação"):
+                dados = json.dumps({
+                    "areas": [
+                        {"area": area, "tecnologia": tecnologia, "demanda": demanda[area]}
+                        for area, tecnologia in zip(areas, tecnologias)
+                    ],
+                    # Uma entrada por tecnologia distinta, mesmo que várias áreas a compartilhem
+                    "certificacoes": certs,
+                }, ensure_ascii=False)
+            messages = [
+                SystemMessage(content=SYSTEM_INSTRUCTION_COMPARACAO),
+                SystemMessage(content="Resultados das ferramentas:\n" + dados),
+                HumanMessage(content=f"Compare as áreas {', '.join(areas)} em {local} e monte um plano comparativo."),
+            ]
+            response = _chamar_llm(self.llm, messages, limite, uso)
             final_text = getattr(response, "content", "")
-            if isinstance(final_text, list):
-                final_text = "".join([str(c) for c in final_text])
-            return {"output": str(final_text).strip()}
+            # Sem reformatação no modo comparação: resposta vazia cai no template com ou sem prazo
+            if not final_text:
+                raise LLMIndisponivelError("LLM retornou resposta vazia")
+        except (PrazoEsgotadoError, LLMIndisponivelError) as e:
+            _avisar_degradacao(e)
+            with perfil.etapa("template local"):
+                final_text = "\n\n".join(
+                    f"{area}:\n" + renderizar_resposta_template({
+                        "analisar_demanda_salarial": demanda[area],
+                        "sugerir_certificacoes_tendencia": certs[tecnologia],
+                    }, area=area, tecnologia=tecnologia)
+                    for area, tecnologia in zip(areas, tecnologias)
+                )
+            degradado = True
+
+        _consultas.inc("comparacao", str(degradado).lower())
+        _chamadas_por_consulta.observar(uso["chamadas"])
+        _tokens_por_consulta.observar(uso["tokens"])
+        print("=" * 70 + "\n")
+        resultado = self._finalizar(final_text, "", None, degradado)
+        resultado["resultados"] = {"demanda": demanda, "certificacoes": certs}
+        return resultado
+
+    def _finalizar(
+        self, final_text: Any, user_input: str, sessao: Any, degradado: bool = False
+    ) -> Dict[str, Any]:
+        """Normaliza o texto final e faz o checkpoint da sessão, se houver."""
+        if isinstance(final_text, list):
+            final_text = "".join([str(c) for c in final_text])
+        final_text = str(final_text).strip()
+        
+        if sessao is not None:
+            sessao.historico.extend([HumanMessage(content=user_input), AIMessage(content=final_text)])
+            try:
+                obter_armazem_sessoes().salvar(sessao)
+            except Exception as e:
+                print(f"[WARN] Não foi possível salvar a sessão {sessao.session_id}: {e}")
+        
+        return {"output": final_text, "degradado": degradado}
+
+
+# Clientes do Gemini por nome de modelo e executores por (modelo, tools); o SLA
+# fica fora da chave para o cache não crescer com cada valor distinto de SLA
+_modelos: Dict[str, Any] = {}
+_executores: Dict[Tuple[Any, ...], "LCReActExecutor"] = {}
+_cache_lock = threading.RLock()
+
+
+def _obter_modelo(model_name: str) -> Any:
+    with _cache_lock:
+        modelo = _modelos.get(model_name)
+        if modelo is None:
+            modelo = _modelos[model_name] = ChatGoogleGenerativeAI(model=model_name, temperature=0.2)
+        return modelo
+
 
-    return LCReActExecutor(llm, tools)
+def _chave_tools(tool_router: Dict[str, Callable[..., Any]]) -> Tuple[Tuple[str, Callable[..., Any]], ...]:
+    """Identidade do conjunto de tools: nomes e funções do router."""
+    return tuple(sorted(tool_router.items(), key=lambda item: item[0]))
+
+
+def make_agent(
+    tool_router: Dict[str, Callable[..., Any]], sla_segundos: Optional[float] = None
+) -> LCReActExecutor:
+    """
+    Retorna um executor ReAct com Gemini, pronto para `invoke({"input": ...})`.
+    
+    O executor (cliente do modelo, tools LangChain e `bind_tools`) é criado
+    uma vez por (modelo, tool_router) e reutilizado nas chamadas seguintes;
+    com `sla_segundos`, retorna uma cópia rasa dele com esse SLA padrão. O
+    cliente do Gemini e seus canais são compartilhados por modelo.
+    
+    Com `sla_segundos` (ou `inputs["sla_segundos"]` por chamada), se o LLM não
+    produzir resposta dentro do prazo ou falhar (ex: 429, 503), a resposta é
+    renderizada localmente a partir dos resultados das tools e marcada com
+    `"degradado": True`.
+    
+    O prazo vale para a requisição inteira: `inputs["limite"]` (time.monotonic)
+    permite ao chamador compartilhar um mesmo instante-limite entre turnos; LLM,
+    tools e chamadas HTTP usam o tempo restante como timeout.
+    """
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY não configurada no .env")
+
+    model_name = os.getenv("GEMINI_MODEL_NAME", GEMINI_MODEL_NAME)
+    chave = (model_name, _chave_tools(tool_router))
+    with _cache_lock:
+        executor = _executores.get(chave)
+        if executor is None:
+            # Cópia: mudanças posteriores no dict do chamador não afetam o executor em cache
+            router = dict(tool_router)
+            executor = LCReActExecutor(_obter_modelo(model_name), _build_tools(router), router)
+            _executores[chave] = executor
+    return executor.com_sla(sla_segundos) if sla_segundos is not None else executor
 
 
@@ -3,10 +3,24 @@ Entrypoint do Agente Consultor de Carreira em TI.
 CLI simples que orquestra o agente Gemini com as duas tools reais.
 """
 
+import argparse
+import os
 import sys
+import time
+import uuid
+from typing import Optional
 from tools.demanda_salarios import analisar_demanda_salarial
 from tools.certs_cloud import sugerir_certificacoes_tendencia
 import agent_langchain
+from tools import perfil
+from tools.metricas import REGISTRO
+
+
+PERFIL_RELATORIO_PADRAO = ".cache/perfil.txt"
+
+_reformatacoes = REGISTRO.contador(
+    "agente_reformatacoes_total", "Vezes em que a resposta precisou ser reformatada (nova chamada ao agente)"
+)
 
 
 def validar_formato_resposta(resposta: str) -> bool:
@@ -28,17 +42,83 @@ def validar_formato_resposta(resposta: str) -> bool:
     return len(bullets) >= 5
 
 
+def _parse_args() -> argparse.Namespace:
+    """Argumentos da CLI (área e tecnologia posicionais continuam opcionais)."""
+    parser = argparse.ArgumentParser(description="Agente Consultor de Carreira em TI")
+    parser.add_argument("area", nargs="?", help="Área de TI (ex: \"Engenheiro de DevOps\")")
+    parser.add_argument("tecnologia", nargs="?", help="Tecnologia foco (ex: \"Nuvem\")")
+    parser.add_argument("--sessao", help="Id de sessão para continuar uma conversa anterior")
+    parser.add_argument("--pergunta", help="Pergunta de follow-up (requer --sessao)")
+    parser.add_argument("--comparar", metavar="AREAS",
+                        help="Compara áreas separadas por ';' numa única resposta "
+                             "(ex: \"DevOps;SRE;Platform Engineer\")")
+    parser.add_argument("--tecnologias", metavar="TECNOLOGIAS",
+                        help="Com --comparar: uma tecnologia para todas ou uma por área, separadas por ';' "
+                             "(default: tecnologia posicional ou \"Nuvem\")")
+    parser.add_argument("--local", default="Brasil", help="Local das vagas no modo comparação (default: Brasil)")
+    parser.add_argument("--sla", type=float, metavar="SEGUNDOS",
+                        help="Prazo fim a fim (default: AGENTE_PRAZO_SEGUNDOS; sem ambos, sem prazo); "
+                             "se estourar, responde com template local")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="Grava as métricas da execução ao final (.json = snapshot, senão formato texto)")
+    parser.add_argument("--profile", nargs="?", const=PERFIL_RELATORIO_PADRAO, metavar="RELATORIO",
+                        help="Perfila cada etapa (cProfile + tracemalloc) e grava o relatório "
+                             f"(default: {PERFIL_RELATORIO_PADRAO})")
+    parser.add_argument("--profile-pilhas", metavar="ARQUIVO",
+                        help="Com --profile, grava também pilhas colapsadas para flame graph")
+    args = parser.parse_args()
+    if args.pergunta and not args.sessao:
+        parser.error("--pergunta requer --sessao")
+    if args.profile_pilhas and not args.profile:
+        parser.error("--profile-pilhas requer --profile")
+    if args.comparar:
+        args.areas = [a.strip() for a in args.comparar.split(";") if a.strip()]
+        fonte = args.tecnologias or args.tecnologia or "Nuvem"
+        args.lista_tecnologias = [t.strip() for t in fonte.split(";") if t.strip()]
+        if not args.areas:
+            parser.error("--comparar requer ao menos uma área")
+        if len(args.lista_tecnologias) not in (1, len(args.areas)):
+            parser.error("--tecnologias deve ter uma tecnologia ou uma por área")
+    elif args.tecnologias:
+        parser.error("--tecnologias requer --comparar")
+    return args
+
+
+def _executar_comparacao(
+    agent: "agent_langchain.LCReActExecutor", args: argparse.Namespace, limite: Optional[float]
+) -> None:
+    """Modo comparação: tools de todas as áreas em paralelo e uma única chamada ao LLM."""
+    result = agent.comparar(args.areas, args.lista_tecnologias, local=args.local, limite=limite)
+    print("\n" + "=" * 70)
+    print("📊 PLANO COMPARATIVO")
+    if result.get("degradado"):
+        print("⏱  Resposta degradada: prazo estourado ou LLM indisponível, gerada localmente a partir dos dados das tools")
+    print("=" * 70)
+    print(f"\n{result.get('output', '')}\n")
+    print("=" * 70)
+
+
 def main():
     """Execução principal do agente."""
+    args = _parse_args()
+    if args.profile:
+        perfil.ativar(perfil.Perfilador(amostrar_pilhas=bool(args.profile_pilhas)))
     print("=" * 70)
     print("AGENTE CONSULTOR DE CARREIRA EM TI")
     print("Motor: Gemini 1.5 Pro | Tools: SerpAPI + Web Scraping")
     print("=" * 70)
     
     # Parâmetros (pode ler de sys.argv ou input)
-    if len(sys.argv) >= 3:
-        area = sys.argv[1]
-        tecnologia = sys.argv[2]
+    if args.comparar:
+        area = " vs ".join(args.areas)
+        tecnologia = ", ".join(dict.fromkeys(args.lista_tecnologias))
+    elif args.area and args.tecnologia:
+        area = args.area
+        tecnologia = args.tecnologia
+    elif args.sessao and args.pergunta:
+        # Follow-up: área e tecnologia vêm da sessão; se informadas, as tools são refeitas
+        area = args.area
+        tecnologia = args.tecnologia
     else:
         area = input("\nÁrea de TI (default: Engenheiro de DevOps): ").strip()
         if not area:
@@ -48,8 +128,8 @@ def main():
         if not tecnologia:
             tecnologia = "Nuvem"
     
-    print(f"\n📋 Área: {area}")
-    print(f"💡 Tecnologia: {tecnologia}")
+    print(f"\n📋 Área: {area or '(da sessão)'}")
+    print(f"💡 Tecnologia: {tecnologia or '(da sessão)'}")
     print("\n" + "-" * 70)
     
     # Configurar tool router
@@ -62,29 +142,61 @@ def main():
         # Criar agente LangChain (ReAct + Gemini)
         print("\n🤖 Inicializando agente LangChain (ReAct + Gemini)...")
         # O AgentExecutor usará as tools via ReAct conforme o prompt
-        agent = agent_langchain.make_agent(tool_router)
+        with perfil.etapa("setup do agente"):
+            agent = agent_langchain.make_agent(tool_router)
         
-        # Prompt do usuário
-        prompt_usuario = f"Quero um plano de carreira para a área: {area}, focado em: {tecnologia}."
+        # Um único prazo para a execução inteira, repassado a LLM, tools e HTTP.
+        # Sem --sla nem AGENTE_PRAZO_SEGUNDOS, não há prazo (só os timeouts de cada etapa)
+        prazo = args.sla or float(os.getenv("AGENTE_PRAZO_SEGUNDOS") or 0)
+        limite = time.monotonic() + prazo if prazo > 0 else None
+        
+        if args.comparar:
+            _executar_comparacao(agent, args, limite)
+            return
+        
+        # Prompt do usuário (follow-up reaproveita os resultados da sessão)
+        session_id = args.sessao or uuid.uuid4().hex
+        if args.sessao and args.pergunta:
+            prompt_usuario = args.pergunta
+        else:
+            prompt_usuario = f"Quero um plano de carreira para a área: {area}, focado em: {tecnologia}."
         
         # Executar turno completo com ReAct
-        result = agent.invoke({"input": prompt_usuario})
+        result = agent.invoke({
+            "input": prompt_usuario,
+            "session_id": session_id,
+            "area": area,
+            "tecnologia": tecnologia,
+            "limite": limite
+        })
         resposta = result.get("output", "")
         
-        # Validar formato
-        if not validar_formato_resposta(resposta):
+        # Validar formato (a sessão evita repetir as tools na reformatação).
+        # Resposta degradada já vem no formato do template e o SLA já foi gasto.
+        if not result.get("degradado") and not validar_formato_resposta(resposta):
             print("\n⚠️  Resposta não está no formato ideal, solicitando reformatação...")
+            _reformatacoes.inc()
+            # No follow-up, área/tecnologia podem não ter sido informadas (vêm da sessão)
+            partes = [f"{rotulo} {valor}" for rotulo, valor in (("a área", area), ("a tecnologia", tecnologia)) if valor]
+            escopo = f" para {' e '.join(partes)}" if partes else ""
             result = agent.invoke({
-                "input": f"Reformule a resposta final em exatamente 5 itens objetivos, cada um citando explicitamente 'fonte: ...'. Use os dados das ferramentas já chamadas para a área {area} e tecnologia {tecnologia}."
+                "input": f"Reformule a resposta final em exatamente 5 itens objetivos, cada um citando explicitamente 'fonte: ...'. Use os dados das ferramentas já chamadas{escopo}.",
+                "session_id": session_id,
+                "area": area,
+                "tecnologia": tecnologia,
+                "limite": limite
             })
             resposta = result.get("output", "")
         
         # Exibir resultado final
         print("\n" + "=" * 70)
         print("📊 PLANO DE AÇÃO FINAL")
+        if result.get("degradado"):
+            print("⏱  Resposta degradada: prazo estourado ou LLM indisponível, gerada localmente a partir dos dados das tools")
         print("=" * 70)
         print(f"\n{resposta}\n")
         print("=" * 70)
+        print(f"Sessão: {session_id} (continue com --sessao {session_id} --pergunta \"...\")")
         
     except ValueError as e:
         print(f"\n❌ ERRO DE CONFIGURAÇÃO: {e}")
@@ -102,6 +214,22 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    
+    finally:
+        if args.metricas:
+            try:
+                REGISTRO.salvar(args.metricas)
+                print(f"📈 Métricas gravadas em {args.metricas}")
+            except Exception as e:
+                print(f"[WARN] Não foi possível gravar métricas: {e}")
+        perfilador = perfil.desativar()
+        if perfilador is not None:
+            try:
+                perfilador.salvar(args.profile, args.profile_pilhas)
+                print(f"🔬 Perfil por etapa gravado em {args.profile}"
+                      + (f" (pilhas: {args.profile_pilhas})" if args.profile_pilhas else ""))
+            except Exception as e:
+                print(f"[WARN] Não foi possível gravar o perfil: {e}")
 
 
 if __name__ == "__main__":
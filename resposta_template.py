@@ -0,0 +1,111 @@
+"""
+Resposta determinística (sem LLM) a partir dos resultados das tools.
+Usada quando o SLA do agente estoura: mantém o formato de 5 bullets com
+fonte, renderizado direto de DemandaSalarialData/CertificacoesTendenciaData.
+"""
+
+from typing import Dict, Any, List, Optional
+
+from schema import CertificacoesTendenciaData, DemandaSalarialData
+
+
+FONTE_DEMANDA = "fonte: Google Jobs via SerpAPI"
+FONTE_CERTS = "fonte: Páginas oficiais (AWS/Microsoft/Google Cloud)"
+
+
+def _extrair(resultados: Dict[str, Any], nome: str, modelo: Any) -> Optional[Any]:
+    """Valida o payload "data" de uma tool; None se ausente, com erro ou inválido."""
+    registro = resultados.get(nome)
+    if not registro:
+        return None
+    # Aceita tanto o resultado cru da tool quanto {"args": ..., "resultado": ...} da sessão
+    resultado = registro.get("resultado", registro)
+    if "data" not in resultado:
+        return None
+    try:
+        return modelo(**resultado["data"])
+    except Exception:
+        return None
+
+
+def _formatar_reais(valor: float) -> str:
+    return f"R$ {valor:,.0f}".replace(",", ".")
+
+
+def renderizar_resposta_template(
+    resultados: Dict[str, Any],
+    area: Optional[str] = None,
+    tecnologia: Optional[str] = None,
+) -> str:
+    """
+    Gera os 5 bullets com fonte a partir dos resultados das tools.
+
+    Args:
+        resultados: nome da tool → resultado ({"data": ...} ou {"error": ...})
+        area: área pedida (usada se a tool de demanda não tiver resultado)
+        tecnologia: tecnologia pedida (idem para certificações)
+    """
+    demanda = _extrair(resultados, "analisar_demanda_salarial", DemandaSalarialData)
+    certs = _extrair(resultados, "sugerir_certificacoes_tendencia", CertificacoesTendenciaData)
+    area = demanda.area if demanda else (area or "a área pedida")
+    tecnologia = certs.tecnologia if certs else (tecnologia or "a tecnologia pedida")
+
+    bullets: List[str] = []
+
+    # 1. Mercado
+    if demanda and demanda.amostra:
+        empresas = ", ".join(demanda.principais_empresas) or "empresas diversas"
+        bullets.append(
+            f"Mercado: {demanda.amostra} vagas encontradas para {area} em {demanda.local}, "
+            f"com destaque para {empresas} ({FONTE_DEMANDA})"
+        )
+    else:
+        bullets.append(f"Mercado: dados de demanda para {area} indisponíveis no momento ({FONTE_DEMANDA})")
+
+    # 2. Certificação
+    if certs and certs.certificacoes:
+        principal = certs.certificacoes[0]
+        bullets.append(
+            f"Certificação: priorize {principal.nome} ({principal.provedor}) — {principal.url} ({FONTE_CERTS})"
+        )
+    else:
+        bullets.append(f"Certificação: sugestões para {tecnologia} indisponíveis no momento ({FONTE_CERTS})")
+
+    # 3. Skill
+    if certs and certs.skills_em_alta:
+        bullets.append(
+            f"Skills: invista em {' e '.join(certs.skills_em_alta[:2])}, em alta para {tecnologia} ({FONTE_CERTS})"
+        )
+    else:
+        bullets.append(f"Skills: consulte as trilhas oficiais dos provedores para {tecnologia} ({FONTE_CERTS})")
+
+    # 4. Posicionamento (salário quando houver, senão demanda)
+    salarios = demanda.salarios_mensais if demanda else None
+    if salarios and salarios.p50:
+        faixa = ""
+        if salarios.p25 and salarios.p75:
+            faixa = f" (p25–p75: {_formatar_reais(salarios.p25)} a {_formatar_reais(salarios.p75)})"
+        bullets.append(
+            f"Posicionamento: salário mensal mediano de {_formatar_reais(salarios.p50)}{faixa} "
+            f"em {demanda.vagas_com_salario} vagas com salário publicado ({FONTE_DEMANDA})"
+        )
+    elif demanda and demanda.amostra:
+        bullets.append(
+            f"Posicionamento: poucas vagas publicam salário ({demanda.vagas_com_salario}/{demanda.amostra}); "
+            f"negocie com base na demanda e nas empresas que mais contratam ({FONTE_DEMANDA})"
+        )
+    else:
+        bullets.append(f"Posicionamento: faixa salarial indisponível no momento ({FONTE_DEMANDA})")
+
+    # 5. Ação imediata
+    if certs and certs.certificacoes and demanda and demanda.principais_cidades:
+        bullets.append(
+            f"Ação: comece a preparação para {certs.certificacoes[0].nome} e mapeie vagas em "
+            f"{demanda.principais_cidades[0]} ({FONTE_DEMANDA}; {FONTE_CERTS})"
+        )
+    elif certs and certs.certificacoes:
+        bullets.append(f"Ação: comece hoje a preparação para {certs.certificacoes[0].nome} ({FONTE_CERTS})")
+    else:
+        bullets.append(f"Ação: acompanhe novas vagas de {area} nesta semana ({FONTE_DEMANDA})")
+
+    return "\n".join(f"{i}. {bullet}" for i, bullet in enumerate(bullets, start=1))
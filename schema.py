@@ -14,6 +14,13 @@ class SalariosPercentis(BaseModel):
     p75: Optional[float] = None
 
 
+class IntervaloConfianca(BaseModel):
+    """Intervalo de confiança (livre de distribuição) para a mediana salarial."""
+    inferior: float
+    superior: float
+    confianca: float = 0.95
+
+
 class DemandaSalarialData(BaseModel):
     """Dados de demanda e salários para uma área."""
     area: str
@@ -21,9 +28,11 @@ class DemandaSalarialData(BaseModel):
     amostra: int = 0
     vagas_com_salario: int = 0
     salarios_mensais: SalariosPercentis = Field(default_factory=SalariosPercentis)
+    ic_mediana: Optional[IntervaloConfianca] = None
     principais_empresas: List[str] = Field(default_factory=list)
     principais_cidades: List[str] = Field(default_factory=list)
     observacoes: str = ""
+    duplicatas_removidas: int = 0
     fonte: str = "Google Jobs via SerpAPI"
 
 
@@ -40,6 +49,7 @@ class CertificacoesTendenciaData(BaseModel):
     certificacoes: List[Certificacao] = Field(default_factory=list)
     skills_em_alta: List[str] = Field(default_factory=list)
     fonte: str = "Páginas oficiais (AWS/Microsoft/Google Cloud)"
+    origem: str = "scraping"
 
 
 class ErrorResponse(BaseModel):
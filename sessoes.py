@@ -0,0 +1,121 @@
+"""
+Sessões multi-turno do agente com checkpoint local (SQLite).
+Guarda o histórico da conversa e os resultados das tools por session id,
+serializados com o serializer do langgraph-checkpoint. Sessões sem uso há
+mais que o TTL expiram e são apagadas a cada gravação.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from tools.dados import caminho_dados
+
+
+SESSOES_DB_PATH = caminho_dados("sessoes.db")
+# Sessões sem atualização há mais que isso expiram (SESSOES_TTL_DIAS no .env; <= 0 nunca expira)
+SESSOES_TTL_DIAS = 7
+
+# Limites do histórico restaurado (o restante é descartado, do mais antigo)
+MAX_HISTORICO_MENSAGENS = 12
+MAX_HISTORICO_CHARS = 8000
+
+
+@dataclass
+class Sessao:
+    """Estado checkpointado de uma sessão."""
+    session_id: str
+    historico: List[BaseMessage] = field(default_factory=list)
+    resultados_tools: Dict[str, Any] = field(default_factory=dict)
+
+    def truncar(self) -> None:
+        """Mantém só as mensagens mais recentes dentro dos limites de tamanho."""
+        historico = self.historico[-MAX_HISTORICO_MENSAGENS:]
+        total = 0
+        inicio = len(historico)
+        for i in range(len(historico) - 1, -1, -1):
+            total += len(str(historico[i].content))
+            if total > MAX_HISTORICO_CHARS:
+                break
+            inicio = i
+        self.historico = historico[inicio:]
+
+
+class ArmazemSessoes:
+    """Checkpoint da última versão de cada sessão em SQLite, com expiração por `atualizado_em`."""
+
+    def __init__(self, caminho: str = SESSOES_DB_PATH, ttl_segundos: float = SESSOES_TTL_DIAS * 86400):
+        if caminho != ":memory:":
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_segundos = ttl_segundos
+        self._serde = JsonPlusSerializer()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes ("
+                "session_id TEXT PRIMARY KEY, tipo TEXT NOT NULL, dados BLOB NOT NULL, "
+                "atualizado_em REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_atualizado_em ON sessoes(atualizado_em)")
+
+    def _expira_antes_de(self) -> float:
+        """Sessões atualizadas antes deste instante estão expiradas."""
+        return time.time() - self.ttl_segundos if self.ttl_segundos > 0 else float("-inf")
+
+    def carregar(self, session_id: str) -> Optional[Sessao]:
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT tipo, dados FROM sessoes WHERE session_id = ? AND atualizado_em >= ?",
+                (session_id, self._expira_antes_de()),
+            ).fetchone()
+        if linha is None:
+            return None
+        try:
+            estado = self._serde.loads_typed((linha[0], linha[1]))
+        except Exception as e:
+            print(f"[WARN] Checkpoint da sessão {session_id} ilegível, iniciando do zero: {e}")
+            return None
+        return Sessao(
+            session_id=session_id,
+            historico=estado.get("historico", []),
+            resultados_tools=estado.get("resultados_tools", {}),
+        )
+
+    def salvar(self, sessao: Sessao) -> None:
+        sessao.truncar()
+        tipo, dados = self._serde.dumps_typed({
+            "historico": sessao.historico,
+            "resultados_tools": sessao.resultados_tools,
+        })
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessoes (session_id, tipo, dados, atualizado_em) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET tipo = excluded.tipo, dados = excluded.dados, "
+                "atualizado_em = excluded.atualizado_em",
+                (sessao.session_id, tipo, dados, time.time()),
+            )
+            self._conn.execute("DELETE FROM sessoes WHERE atualizado_em < ?", (self._expira_antes_de(),))
+
+
+_armazem: Optional[ArmazemSessoes] = None
+_armazem_lock = threading.Lock()
+
+
+def obter_armazem_sessoes() -> ArmazemSessoes:
+    """Retorna o armazém do processo (caminho via SESSOES_DB_PATH no .env)."""
+    global _armazem
+    with _armazem_lock:
+        if _armazem is None:
+            _armazem = ArmazemSessoes(
+                caminho_dados("sessoes.db", "SESSOES_DB_PATH"),
+                ttl_segundos=float(os.getenv("SESSOES_TTL_DIAS", SESSOES_TTL_DIAS)) * 86400,
+            )
+        return _armazem
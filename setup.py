@@ -22,6 +22,23 @@ GOOGLE_API_KEY=
 # SerpAPI Key
 # Obter em: https://serpapi.com/manage-api-key
 SERPAPI_API_KEY=
+
+# Cota da SerpAPI (opcional; <= 0 desativa o limite)
+# SERPAPI_LIMITE_DIARIO=50
+# SERPAPI_LIMITE_MENSAL=250
+# SERPAPI_TAXA_POR_SEGUNDO=1
+
+# Diretório dos dados persistentes (cota da SerpAPI, vagas, sessões; default: <projeto>/.cache)
+# AGENTE_DADOS_DIR=/caminho/para/dados
+
+# Dias sem uso até uma sessão expirar (opcional; <= 0 nunca expira)
+# SESSOES_TTL_DIAS=7
+
+# Áreas mantidas quentes pelo aquecedor de cache (opcional, separadas por ;)
+# CACHE_AREAS_POPULARES=Engenheiro de DevOps;Data Engineer
+
+# Prazo fim a fim de cada execução do agente, em segundos (opcional; sem ele, não há prazo)
+# AGENTE_PRAZO_SEGUNDOS=120
 """
     
     env_path.write_text(env_template, encoding='utf-8')
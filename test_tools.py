@@ -1,12 +1,49 @@
 """
-Testes básicos das tools (smoke tests).
-Execute: python test_tools.py
+Testes das tools e do agente: smoke tests (chamadas reais, com chaves no .env)
+e testes offline.
+Execute: python test_tools.py (ou python -m pytest test_tools.py)
 """
 
+import atexit
 import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Dados persistentes (caches, cota, vagas, sessões) num diretório temporário, antes de
+# importar as tools: os testes não leem nem gravam o .cache do projeto. Variáveis vazias
+# impedem que caminhos específicos do .env (carregado depois) apontem para outro lugar.
+_DADOS_TESTE = tempfile.mkdtemp(prefix="agente-testes-")
+atexit.register(shutil.rmtree, _DADOS_TESTE, ignore_errors=True)
+os.environ["AGENTE_DADOS_DIR"] = _DADOS_TESTE
+for _variavel in ("SERPAPI_USO_PATH", "VAGAS_DB_PATH", "SESSOES_DB_PATH", "CERTS_CACHE_PATH", "DEMANDA_CACHE_PATH"):
+    os.environ[_variavel] = ""
+
 from dotenv import load_dotenv
-from tools.demanda_salarios import analisar_demanda_salarial
+from tools import demanda_salarios
+from tools.demanda_salarios import analisar_demanda_salarial, intervalo_mediana
+from tools import certs_cloud
 from tools.certs_cloud import sugerir_certificacoes_tendencia
+from tools.serpapi_quota import LimitadorSerpApi, OrcamentoEsgotadoError
+from tools import cache_warmer
+from tools.cache import CacheTTL
+from tools.cache_warmer import AquecedorCache
+from tools.circuit_breaker import CircuitBreaker, ABERTO, FECHADO
+from tools.vagas_store import VagasStore
+from tools.dedup import DeduplicadorVagas, IndiceFingerprints, fingerprint_vaga
+from tools.canonico import ALIASES_EMPRESAS, ContadorIds, IndiceCanonico
+from tools.serpapi_stream import iterar_jobs
+from tools.metricas import RegistroMetricas
+from tools.perfil import Perfilador
+from tools.prazo import PrazoEsgotadoError, limite_atual, prazo, tempo_restante
+from tools.indice_certs import IndiceCertificacoes, construir_indice
+from langchain_core.messages import AIMessage, HumanMessage
+import agent_langchain
+from agent_langchain import LCReActExecutor
+from resposta_template import renderizar_resposta_template
+from sessoes import MAX_HISTORICO_MENSAGENS, ArmazemSessoes, Sessao
 
 load_dotenv()
 
@@ -64,27 +101,621 @@ def test_certificacoes():
     return True
 
 
+def test_limitador_serpapi():
+    """Testa orçamento persistente do limitador da SerpAPI (offline)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "uso.json")
+        limitador = LimitadorSerpApi(taxa_por_segundo=100, rajada=5, limite_diario=2,
+                                     limite_mensal=10, caminho_uso=caminho)
+        limitador.adquirir()
+        limitador.adquirir()
+        try:
+            limitador.adquirir()
+            assert False, "deveria esgotar o orçamento diário"
+        except OrcamentoEsgotadoError:
+            pass
+
+        # Contagem sobrevive a um novo processo (novo limitador)
+        outro = LimitadorSerpApi(limite_diario=5, caminho_uso=caminho)
+        assert outro.status()["creditos_dia"] == 2
+        outro.estornar()
+        assert outro.status()["creditos_dia"] == 1
+
+        # Limitadores independentes (como CLI e aquecedor) não perdem atualizações do arquivo
+        caminho = os.path.join(tmp, "concorrente.json")
+        limitadores = [LimitadorSerpApi(taxa_por_segundo=1e6, rajada=1000, limite_diario=0,
+                                        limite_mensal=0, caminho_uso=caminho) for _ in range(4)]
+
+        def consumir(limitador):
+            for _ in range(25):
+                limitador.adquirir()
+
+        threads = [threading.Thread(target=consumir, args=(l,)) for l in limitadores]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert limitadores[0].status()["creditos_dia"] == 100
+
+
+def test_circuit_breaker():
+    """Testa abertura e sonda meio-aberta do circuit breaker (offline)."""
+    disjuntor = CircuitBreaker("teste", limiar_falhas=2, tempo_recuperacao=0.0)
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == FECHADO
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == ABERTO
+
+    # Recuperação imediata: libera uma única sonda
+    assert disjuntor.permite_chamada()
+    assert not disjuntor.permite_chamada()
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == FECHADO
+
+
+def test_certs_fallback_fora_do_cache():
+    """Testa que a certificação core (página sem certificações) não vira "último resultado bom" (offline)."""
+    resposta = mock.Mock(text="<html><a href='/x'>Sobre</a></html>")
+    resposta.raise_for_status.return_value = None
+    with mock.patch.object(certs_cloud.requests, "get", return_value=resposta), \
+            mock.patch.object(certs_cloud, "_cache_provedores", CacheTTL(ttl_segundos=60)):
+        certs = certs_cloud._coletar_provedor("gcp")
+        assert certs == [certs_cloud.CERTS_CORE["gcp"]]
+        assert certs_cloud._cache_provedores.obter_entrada("gcp") is None
+
+        resposta.text = ("<html><a href='/certification/cloud-engineer'>"
+                         "Associate Cloud Engineer</a></html>")
+        certs = certs_cloud._coletar_provedor("gcp")
+        assert certs[0]["url"] == "https://cloud.google.com/certification/cloud-engineer"
+        assert certs_cloud._cache_provedores.obter_entrada("gcp").valor == certs
+
+
+def test_cache_persistente():
+    """Testa cópias nas leituras e entradas renovadas por outro processo via SQLite (offline)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "cache.db")
+        cache = CacheTTL(ttl_segundos=60, caminho=caminho)
+        cache.definir(("sre", "brasil"), {"data": {"amostra": 10}})
+        cache.obter(("sre", "brasil"))["data"]["amostra"] = 0
+        assert cache.obter(("sre", "brasil")) == {"data": {"amostra": 10}}
+
+        # Outro processo (ex: o aquecedor) lê e renova a mesma entrada
+        outro = CacheTTL(ttl_segundos=60, caminho=caminho)
+        assert outro.obter(("sre", "brasil")) == {"data": {"amostra": 10}}
+        cache.definir(("devops", "brasil"), {"data": {"amostra": 1}}, ttl_segundos=0)
+        outro.definir(("devops", "brasil"), {"data": {"amostra": 2}})
+        assert cache.obter(("devops", "brasil")) == {"data": {"amostra": 2}}
+
+
+def test_aquecedor_ciclo():
+    """Testa o ciclo do aquecedor: só o que expira, limite de créditos e sem scraping com índice (offline)."""
+    aquecedor = AquecedorCache(areas=["SRE", "DevOps", "Data Engineer"], max_creditos_por_ciclo=1)
+    aquecedor.registrar_consulta("sre", "brasil")
+    # Consultas feitas por outro processo (ex: a CLI) chegam pelo store
+    store = VagasStore(":memory:")
+    store.registrar_consulta("platform engineer", "Brasil", consultado_em=time.time() - 30 * 86400)
+    store.registrar_consulta("Platform Engineer", "Brasil")
+    store.registrar_consulta("QA", "Brasil", consultado_em=time.time() - 30 * 86400)
+    with mock.patch.object(cache_warmer, "obter_store", return_value=store):
+        candidatos = aquecedor._candidatos()
+    assert candidatos == [("SRE", "Brasil"), ("DevOps", "Brasil"), ("Data Engineer", "Brasil"),
+                          ("Platform Engineer", "Brasil")]
+    expiracoes = {"sre": None, "devops": time.time() + 10, "data engineer": time.time() + 3600 * 24}
+    demanda = mock.Mock(return_value={"data": {}})
+    with mock.patch.object(cache_warmer.demanda_salarios, "expiracao_cache",
+                           side_effect=lambda area, local: expiracoes[area.lower()]), \
+            mock.patch.object(cache_warmer.demanda_salarios, "analisar_demanda_salarial", demanda), \
+            mock.patch.object(cache_warmer, "obter_store", return_value=VagasStore(":memory:")), \
+            mock.patch.object(cache_warmer, "obter_limitador") as limitador, \
+            mock.patch.object(cache_warmer.certs_cloud, "revalidar_provedor") as revalidar:
+        limitador.return_value.status.return_value = {
+            "limite_diario": 0, "creditos_dia": 0, "limite_mensal": 0, "creditos_mes": 0,
+        }
+        resumo = aquecedor.executar_ciclo()
+
+    assert resumo == {"demanda_renovadas": 1, "demanda_puladas": 1, "provedores_renovados": 0}
+    assert demanda.call_args.kwargs["area"] == "SRE"
+    revalidar.assert_not_called()  # certificações vêm do índice offline
+
+
+def test_vagas_store():
+    """Testa deduplicação por job_id e consulta por janela no store local (offline)."""
+    store = VagasStore(":memory:")
+    vaga = {"job_id": "abc", "empresa": "Nubank", "cidade": "São Paulo", "salario_mensal": 12000.0}
+
+    assert store.registrar_vagas([vaga], "Data Engineer", "Brasil", coletado_em=1000.0) == 1
+    assert store.registrar_vagas([vaga], "data engineer", "Brasil", coletado_em=2000.0) == 0
+    assert store.ultima_coleta("Data Engineer", "brasil") == 2000.0
+
+    # Revista na segunda coleta: entra na janela que começa depois da primeira
+    assert store.consultar_janela("Data Engineer", "Brasil", desde=1500.0) == [("Nubank", "São Paulo", 12000.0)]
+    assert store.consultar_janela("Data Engineer", "Brasil", desde=2500.0) == []
+    assert store.job_id_por_fingerprint(1 << 63) is None
+
+    # A mesma vaga vista depois em outra área conta para as duas
+    assert store.registrar_vagas([vaga], "Analytics Engineer", "Brasil", coletado_em=3000.0) == 0
+    assert store.consultar_janela("Analytics Engineer", "Brasil", desde=0.0) == [("Nubank", "São Paulo", 12000.0)]
+    assert store.consultar_janela("Data Engineer", "Brasil", desde=2500.0) == []
+
+    # Coleta sem vagas também marca o intervalo como coletado
+    assert store.ultima_coleta("QA", "Brasil") is None
+    store.marcar_coleta("QA", "Brasil", coletado_em=4000.0)
+    assert store.ultima_coleta("qa", "brasil") == 4000.0
+    with mock.patch.object(demanda_salarios.requests, "get", return_value=_RespostaFalsa('{"jobs_results": []}')), \
+            mock.patch.object(demanda_salarios, "obter_store", return_value=store):
+        resultado = demanda_salarios._consultar_serpapi("QA", "Brasil", "chave", mock.Mock())
+    assert resultado["data"]["amostra"] == 0 and store.ultima_coleta("QA", "Brasil") > 4000.0
+
+    # Fingerprints unsigned de 64 bits sobrevivem à ida e volta pelo SQLite
+    store.registrar_vagas([{"job_id": "def", "fingerprint": (1 << 63) + 5}], "SRE", "Brasil")
+    assert store.job_id_por_fingerprint((1 << 63) + 5) == "def"
+
+
+def test_fingerprint_vagas():
+    """Testa equivalências e quase-duplicatas no fingerprint das vagas (offline)."""
+    base = fingerprint_vaga("Itaú Unibanco", "Engenheiro de Dados Sr.", "São Paulo, SP", "R$ 12.000 por mês")
+    # Caixa, acentos, pontuação, UF e texto do salário não mudam o fingerprint
+    assert fingerprint_vaga("ITAU UNIBANCO", "engenheiro de dados sr", "Sao Paulo, Brasil", "12.000/mês") == base
+    assert fingerprint_vaga("itaú unibanco", "Engenheiro-de-Dados (Sr)", "são paulo", "R$12.000") == base
+    # Título, cidade ou salário diferentes são vagas diferentes
+    assert fingerprint_vaga("Itaú Unibanco", "Engenheiro de Dados Pl.", "São Paulo, SP", "R$ 12.000") != base
+    assert fingerprint_vaga("Itaú Unibanco", "Engenheiro de Dados Sr.", "Campinas, SP", "R$ 12.000") != base
+    assert fingerprint_vaga("Itaú Unibanco", "Engenheiro de Dados Sr.", "São Paulo, SP", "R$ 15.000") != base
+
+
+def test_deduplicador_vagas():
+    """Testa dedup na análise e job_id canônico compartilhado entre análises e com o histórico (offline)."""
+    indice = IndiceFingerprints(consultar={7: "vaga-antiga"}.get)
+    primeira = DeduplicadorVagas(indice)
+    assert primeira.registrar(1, "linkedin-1") == "linkedin-1"
+    assert primeira.registrar(1, "indeed-9") is None  # mesma vaga em outro site
+    assert primeira.registrar(2, None) == "fp:0000000000000002"
+    assert primeira.removidas == 1
+
+    # Outra análise (outro local/execução): a vaga conta de novo, com o mesmo job_id canônico
+    segunda = DeduplicadorVagas(indice)
+    assert segunda.registrar(1, "gupy-3") == "linkedin-1"
+    assert segunda.registrar(7, "nova") == "vaga-antiga"  # resolvida pelo histórico
+    assert segunda.removidas == 0
+
+
+def test_canonicalizacao_empresas():
+    """Testa aliases, acentos e sufixos societários no índice canônico (offline)."""
+    indice = IndiceCanonico(ALIASES_EMPRESAS, remover_sufixos=True)
+    ids = {indice.id(nome) for nome in ("Itaú Unibanco", "Itau Unibanco S.A.", "itaú")}
+    assert len(ids) == 1
+    assert indice.nome(ids.pop()) == "Itaú Unibanco"
+    assert indice.id("Banco do Brasil") != indice.id("Banco")
+    # Regressão: o alias é conferido após cada sufixo removido ("s a", depois "do brasil")
+    assert indice.id("Banco do Brasil S.A.") == indice.id("Banco do Brasil")
+    assert indice.chave("Banco do Brasil S.A.") == "banco do brasil"
+    assert indice.chave("Grupo Brasil Ltda") == "grupo brasil"
+    assert indice.chave("Accenture do Brasil Ltda.") == "accenture"
+    assert indice.chave("Seguros do Brasil") == "seguros do brasil"
+
+    # O atalho por grafia bruta é limitado; os ids continuam estáveis
+    pequeno = IndiceCanonico({}, max_grafias=2)
+    ids = [pequeno.id(nome) for nome in ("A", "B", "C", "a", "A")]
+    assert ids == [0, 1, 2, 0, 0] and len(pequeno._ids_por_bruto) <= 2
+
+    contador = ContadorIds()
+    for nome in ("Nubank", "Itaú", "Nubank", "NUBANK LTDA"):
+        contador.adicionar(indice.id(nome))
+    assert [indice.nome(i) for i, _ in contador.top_k(1)] == ["Nubank"]
+    outro = ContadorIds()
+    outro.adicionar(indice.id("Itaú"), 5)
+    contador.mesclar(outro)
+    assert contador.top_k(2) == [(indice.id("Itaú"), 6), (indice.id("Nubank"), 3)] and contador.total() == 9
+
+
+def test_indice_certificacoes():
+    """Testa ranking do índice offline de certificações (offline)."""
+    indice = IndiceCertificacoes(construir_indice(com_rede=False))
+
+    certs = indice.buscar("DevOps", por_provedor=1)
+    assert {c["provedor"] for c in certs} == {"AWS", "Microsoft", "Google Cloud"}
+    assert all("DevOps" in c["nome"] for c in certs)
+
+    # Tecnologia desconhecida cai no perfil "Nuvem"
+    assert indice.buscar("Tecnologia Inexistente") == indice.buscar("Nuvem")
+
+    # Páginas sem certificações não acrescentam a core conhecida (fallback) ao snapshot
+    vazia = mock.Mock(text="<html><body></body></html>")
+    with mock.patch("requests.get", return_value=vazia):
+        com_crawl = construir_indice(com_rede=True)
+    assert com_crawl["certificacoes"] == construir_indice(com_rede=False)["certificacoes"]
+
+
+def test_stream_serpapi():
+    """Testa o parsing incremental de jobs_results com chunks cortando tokens e UTF-8 (offline)."""
+    corpo = (
+        '{"search_metadata": {"id": "x"}, "jobs_results": [{"title": "Engenheiro de Dados", "n": 12345}, '
+        '{"title": "SRE São Paulo", "n": 1.5}], "serpapi_pagination": {"next_page_token": "abc"}}'
+    ).encode("utf-8")
+    chunks = [corpo[i:i + 3] for i in range(0, len(corpo), 3)]
+    extras = {}
+    jobs = list(iterar_jobs(chunks, extras))
+
+    assert [j["title"] for j in jobs] == ["Engenheiro de Dados", "SRE São Paulo"]
+    assert jobs[0]["n"] == 12345
+    assert extras == {"serpapi_pagination": {"next_page_token": "abc"}}
+    assert list(iterar_jobs([b'{"error": "Invalid API key"}'])) == []
+
+
+class _RespostaFalsa:
+    """Resposta HTTP 200 mínima para `requests.get(..., stream=True)`."""
+
+    def __init__(self, corpo: str):
+        self._corpo = corpo.encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        return [self._corpo[i:i + 7] for i in range(0, len(self._corpo), 7)]
+
+    def close(self):
+        pass
+
+
+def test_serpapi_erros_na_resposta():
+    """Testa `error` no corpo 200 e JSON malformado na paginação da SerpAPI (offline)."""
+    pagina_1 = (
+        '{"jobs_results": [{"job_id": "a", "company_name": "Nubank", "title": "SRE", "location": "São Paulo"}], '
+        '"serpapi_pagination": {"next_page_token": "p2"}}'
+    )
+    truncada = '{"jobs_results": [{"job_id": "b", "company_name": "Itaú", "title": "SRE", "location": "Campinas"}, {"job'
+
+    def consultar(*corpos):
+        limitador = mock.Mock()
+        with mock.patch.object(demanda_salarios.requests, "get", side_effect=[_RespostaFalsa(c) for c in corpos]), \
+                mock.patch.object(demanda_salarios, "obter_store", return_value=VagasStore(":memory:")):
+            resultado = demanda_salarios._consultar_serpapi(
+                "SRE", "Brasil", "chave", limitador, max_paginas=3,
+                deduplicador=DeduplicadorVagas(IndiceFingerprints()),
+            )
+        return resultado, limitador
+
+    # `error` na 1ª página vira erro (e o crédito é estornado), não amostra vazia
+    resultado, limitador = consultar('{"search_metadata": {}, "error": "Invalid API key."}')
+    assert resultado["error"]["details"] == "Invalid API key."
+    limitador.estornar.assert_called_once()
+
+    # JSON malformado na 2ª página mantém a 1ª e a vaga já lida da 2ª
+    resultado, limitador = consultar(pagina_1, truncada)
+    assert resultado["data"]["amostra"] == 2
+    assert "Paginação interrompida após 1 página(s)" in resultado["data"]["observacoes"]
+    limitador.estornar.assert_not_called()
+
+    # `error` na 2ª página interrompe a paginação sem descartar a 1ª
+    resultado, limitador = consultar(pagina_1, '{"error": "Your account has run out of searches."}')
+    assert resultado["data"]["amostra"] == 1
+    assert "Your account has run out of searches." in resultado["data"]["observacoes"]
+    limitador.estornar.assert_called_once()
+
+    # Busca sem vagas é amostra vazia, não erro (e o crédito foi cobrado)
+    resultado, limitador = consultar(
+        '{"search_metadata": {}, "error": "Google hasn\'t returned any results for this query."}'
+    )
+    assert resultado["data"]["amostra"] == 0 and "Nenhuma vaga encontrada" in resultado["data"]["observacoes"]
+    limitador.estornar.assert_not_called()
+
+    # JSON malformado já na 1ª página mantém as vagas lidas antes do erro
+    resultado, _ = consultar(truncada)
+    assert resultado["data"]["amostra"] == 1
+    assert "resposta malformada (1 vagas lidas)" in resultado["data"]["observacoes"]
+
+
+def test_amostragem_adaptativa_parada():
+    """Testa a chave de cache por modo e o motivo real da parada na amostragem adaptativa (offline)."""
+    assert demanda_salarios._chave_cache(" SRE ", "Brasil") == ("sre", "brasil")
+    assert demanda_salarios._chave_cache("SRE", "Brasil", 5, 0.15) != demanda_salarios._chave_cache("SRE", "Brasil")
+
+    ultima = '{"jobs_results": [{"job_id": "a", "company_name": "Nubank", "title": "SRE", "location": "São Paulo"}]}'
+    continua = ultima[:-1] + ', "serpapi_pagination": {"next_page_token": "p2"}}'
+
+    def observacoes(corpo, max_paginas):
+        with mock.patch.object(demanda_salarios.requests, "get", return_value=_RespostaFalsa(corpo)), \
+                mock.patch.object(demanda_salarios, "obter_store", return_value=VagasStore(":memory:")):
+            resultado = demanda_salarios._consultar_serpapi(
+                "SRE", "Brasil", "chave", mock.Mock(), max_paginas=max_paginas, largura_alvo=0.15,
+                deduplicador=DeduplicadorVagas(IndiceFingerprints()),
+            )
+        return resultado["data"]["observacoes"]
+
+    assert "1 página(s), salários insuficientes para o IC da mediana (sem mais páginas na SerpAPI)" in observacoes(ultima, 5)
+    assert "(limite de 1 página(s))" in observacoes(continua, 1)
+
+
+def test_prazo_requisicao():
+    """Testa o timeout derivado do prazo e a tool respeitando prazo esgotado (offline)."""
+    assert tempo_restante(30) == 30
+    with prazo(time.monotonic() + 5):
+        assert 4 < tempo_restante(30) <= 5
+        assert tempo_restante(2) == 2
+    with prazo(time.monotonic() - 1):
+        try:
+            tempo_restante(30)
+            assert False, "prazo esgotado deveria levantar PrazoEsgotadoError"
+        except PrazoEsgotadoError:
+            pass
+        resultado = sugerir_certificacoes_tendencia(tecnologia="DevOps", ao_vivo=True)
+        assert "prazo" in resultado["error"]["details"]
+
+
+def test_registro_metricas():
+    """Testa contadores, histograma cumulativo e exposição em texto (offline)."""
+    registro = RegistroMetricas()
+    chamadas = registro.contador("tool_chamadas_total", "Chamadas", ("tool", "resultado"))
+    chamadas.inc("demanda", "ok")
+    chamadas.inc("demanda", "ok")
+    chamadas.inc("demanda", "erro")
+    latencia = registro.histograma("latencia_segundos", "Latência", buckets=(0.1, 1.0))
+    for valor in (0.05, 0.5, 3.0):
+        latencia.observar(valor)
+
+    assert registro.contador("tool_chamadas_total", "Chamadas", ("tool", "resultado")) is chamadas
+    assert chamadas.valor("demanda", "ok") == 2
+    serie = registro.snapshot()["latencia_segundos"]["series"][0]
+    assert serie["buckets"] == {"0.1": 1, "1": 2, "+Inf": 3}
+
+    texto = registro.exposicao_texto()
+    assert 'tool_chamadas_total{tool="demanda",resultado="erro"} 1' in texto
+    assert 'latencia_segundos_bucket{le="+Inf"} 3' in texto
+    assert "latencia_segundos_count 3" in texto
+
+
+def test_intervalo_mediana():
+    """Testa o IC 95% da mediana por estatísticas de ordem (offline)."""
+    assert intervalo_mediana([1.0, 2.0, 3.0, 4.0, 5.0]) is None  # amostra pequena demais
+    assert intervalo_mediana([float(x) for x in range(1, 21)]) == (6.0, 15.0)
+    assert intervalo_mediana([float(x) for x in range(1, 101)]) == (40.0, 61.0)
+
+
+def test_perfilador_etapas():
+    """Testa etapas aninhadas, relatório e pilhas colapsadas do modo --profile (offline)."""
+    perfilador = Perfilador(top_n=5, amostrar_pilhas=True, intervalo=0.001)
+    perfilador.iniciar()
+    try:
+        with perfilador.etapa("tool demanda"):
+            with perfilador.etapa("parse"):
+                dados = [str(i) * 10 for i in range(20000)]
+            time.sleep(0.02)
+        with perfilador.etapa("tool demanda"):
+            time.sleep(0.02)
+    finally:
+        perfilador.parar()
+
+    nomes = [r.nome for r in perfilador.registros]
+    assert nomes == ["parse #1", "tool demanda #1", "tool demanda #2"]
+    assert perfilador.registros[0].subetapa and not perfilador.registros[1].subetapa
+    relatorio = perfilador.relatorio()
+    assert "ETAPA: parse #1" in relatorio and "cumulative" in relatorio
+    with tempfile.TemporaryDirectory() as tmp:
+        perfilador.salvar(os.path.join(tmp, "perfil.txt"), os.path.join(tmp, "perfil.folded"))
+        with open(os.path.join(tmp, "perfil.folded"), encoding="utf-8") as f:
+            linhas = f.read().splitlines()
+    # Ocorrências da mesma etapa somam nas mesmas pilhas (sem o sufixo "#k")
+    assert linhas and all(linha.startswith("tool_demanda;") for linha in linhas)
+    assert not any("#" in linha.rsplit(" ", 1)[0] for linha in linhas)
+    assert len(dados) == 20000
+
+
+def test_resposta_template():
+    """Testa a resposta de fallback do SLA: 5 bullets com fonte, mesmo com erro (offline)."""
+    resultados = {
+        "analisar_demanda_salarial": {"error": {"status": "error", "message": "Timeout"}},
+        "sugerir_certificacoes_tendencia": sugerir_certificacoes_tendencia(tecnologia="DevOps"),
+    }
+    resposta = renderizar_resposta_template(resultados, area="SRE")
+    linhas = resposta.split("\n")
+
+    assert len(linhas) == 5
+    assert all("fonte:" in linha for linha in linhas)
+    assert "SRE" in linhas[0]
+
+
+class _LLMFalso:
+    """LLM de teste: devolve as respostas roteirizadas, em ordem, e guarda as mensagens recebidas."""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.chamadas = []
+
+    def bind_tools(self, tools):
+        return self
+
+    def invoke(self, messages, **opcoes):
+        self.chamadas.append(messages)
+        return self.respostas.pop(0)
+
+
+_BULLETS = "\n".join(f"{i}. item (fonte: Google Jobs via SerpAPI)" for i in range(1, 6))
+
+
+def test_make_agent_reutiliza_executor():
+    """Testa o reuso do executor e do cliente do modelo no make_agent (offline)."""
+    router = {
+        "analisar_demanda_salarial": analisar_demanda_salarial,
+        "sugerir_certificacoes_tendencia": sugerir_certificacoes_tendencia,
+    }
+    with mock.patch.dict(os.environ, {"GOOGLE_API_KEY": "teste"}), \
+            mock.patch.object(agent_langchain, "ChatGoogleGenerativeAI", side_effect=lambda **_: _LLMFalso()) as cliente, \
+            mock.patch.dict(agent_langchain._modelos, clear=True), \
+            mock.patch.dict(agent_langchain._executores, clear=True):
+        executor = agent_langchain.make_agent(router)
+        assert agent_langchain.make_agent(dict(router)) is executor
+        assert cliente.call_count == 1
+
+        # SLAs distintos compartilham o executor em cache, sem novas entradas
+        for sla in (5, 7.5, 12.25):
+            com_sla = agent_langchain.make_agent(router, sla_segundos=sla)
+            assert com_sla.sla_segundos == sla
+            assert com_sla.llm is executor.llm and com_sla.llm_with_tools is executor.llm_with_tools
+        assert executor.sla_segundos is None
+        assert len(agent_langchain._executores) == 1 and cliente.call_count == 1
+
+
+def test_sla_timeout_no_cliente():
+    """Testa o prazo como timeout da requisição ao Gemini e a resposta degradada (offline)."""
+    class ReadTimeout(Exception):
+        pass
+
+    recebidos = {}
+
+    class _LLMLento(_LLMFalso):
+        def invoke(self, messages, timeout=None, max_retries=None):
+            recebidos.update(timeout=timeout, max_retries=max_retries)
+            raise ReadTimeout("sem resposta")
+
+    executor = LCReActExecutor(_LLMLento(), [], {}, sla=2.0)
+    resultado = executor.invoke({"input": "Plano para SRE", "area": "SRE", "tecnologia": "Nuvem"})
+
+    assert resultado["degradado"]
+    assert 0 < recebidos["timeout"] <= 2.0 and recebidos["max_retries"] == 1
+    assert len(resultado["output"].split("\n")) == 5
+
+    # Sem prazo: timeout máximo por requisição e retentativas padrão do cliente
+    llm = _LLMFalso(AIMessage(content=_BULLETS))
+    with mock.patch.object(llm, "invoke", wraps=llm.invoke) as invoke:
+        agent_langchain._chamar_llm(llm, [], None)
+    assert invoke.call_args.kwargs == {"timeout": agent_langchain.TIMEOUT_LLM}
+
+    # Com prazo, qualquer falha do LLM (ex: 429) também cai no template; sem prazo, propaga
+    class _LLMSobrecarregado(_LLMFalso):
+        def invoke(self, messages, **opcoes):
+            raise RuntimeError("429 Resource exhausted")
+
+    resultado = LCReActExecutor(_LLMSobrecarregado(), [], {}, sla=5.0).invoke({"input": "Plano", "area": "SRE"})
+    assert resultado["degradado"] and len(resultado["output"].split("\n")) == 5
+    try:
+        LCReActExecutor(_LLMSobrecarregado(), [], {}).invoke({"input": "Plano", "area": "SRE"})
+        assert False, "sem prazo, o erro do LLM deveria propagar"
+    except RuntimeError:
+        pass
+
+
+def test_comparacao_areas():
+    """Testa o modo comparação: tools em paralelo, uma chamada ao LLM e fallback por prazo (offline)."""
+    chamadas = []
+
+    def demanda(area, local="Brasil"):
+        chamadas.append(("demanda", area, limite_atual()))
+        return {"data": {"area": area, "local": local, "amostra": 10, "observacoes": "ok"}}
+
+    def certs(tecnologia):
+        chamadas.append(("certs", tecnologia, limite_atual()))
+        return {"data": {"tecnologia": tecnologia, "certificacoes": [], "skills_em_alta": []}}
+
+    router = {"analisar_demanda_salarial": demanda, "sugerir_certificacoes_tendencia": certs}
+    llm = _LLMFalso(AIMessage(content=_BULLETS))
+    limite = time.monotonic() + 30
+    resultado = LCReActExecutor(llm, [], router).comparar(["DevOps", "SRE", "Platform"], ["Nuvem"], limite=limite)
+
+    assert not resultado["degradado"] and len(llm.chamadas) == 1
+    assert sorted(c[:2] for c in chamadas) == [
+        ("certs", "Nuvem"), ("demanda", "DevOps"), ("demanda", "Platform"), ("demanda", "SRE"),
+    ]
+    # O prazo chega às threads das tools
+    assert all(c[2] == limite for c in chamadas)
+
+    # Tool lenta estoura o prazo: sem chamada ao LLM, resposta pelo template local
+    def demanda_lenta(area, local="Brasil"):
+        time.sleep(0.3)
+        return demanda(area, local)
+
+    llm = _LLMFalso()
+    executor = LCReActExecutor(llm, [], {**router, "analisar_demanda_salarial": demanda_lenta})
+    resultado = executor.comparar(["DevOps", "SRE"], ["Nuvem", "Kubernetes"], limite=time.monotonic() + 0.1)
+    assert resultado["degradado"] and llm.chamadas == []
+    assert resultado["output"].startswith("DevOps:") and "SRE:" in resultado["output"]
+    assert resultado["resultados"]["demanda"]["SRE"]["error"]["status"] == "deadline_exceeded"
+
+    # Resposta vazia do LLM, mesmo sem prazo, também cai no template
+    resultado = LCReActExecutor(_LLMFalso(AIMessage(content="")), [], router).comparar(["DevOps"])
+    assert resultado["degradado"] and resultado["output"].startswith("DevOps:")
+
+
+def test_sessoes_checkpoint():
+    """Testa salvar/carregar sessão e a truncagem do histórico (offline)."""
+    armazem = ArmazemSessoes(":memory:")
+    historico = [HumanMessage(content=f"pergunta {i}") for i in range(MAX_HISTORICO_MENSAGENS + 5)]
+    resultados = {"sugerir_certificacoes_tendencia": {"args": {"tecnologia": "Nuvem"}, "resultado": {"data": {}}}}
+    armazem.salvar(Sessao("s1", historico=historico, resultados_tools=resultados))
+
+    sessao = armazem.carregar("s1")
+    assert [m.content for m in sessao.historico] == [m.content for m in historico[-MAX_HISTORICO_MENSAGENS:]]
+    assert sessao.resultados_tools == resultados
+    assert armazem.carregar("inexistente") is None
+
+    longa = Sessao("s2", historico=[HumanMessage(content="x" * 5000) for _ in range(3)])
+    longa.truncar()
+    assert len(longa.historico) == 1
+
+    # Sessões sem uso além do TTL não são restauradas e somem na próxima gravação
+    armazem.salvar(Sessao("antiga"))
+    with mock.patch("sessoes.time.time", return_value=time.time() + 8 * 86400):
+        assert armazem.carregar("antiga") is None
+        armazem.salvar(Sessao("nova"))
+        assert armazem.carregar("nova") is not None
+    assert armazem._conn.execute("SELECT session_id FROM sessoes ORDER BY session_id").fetchall() == [("nova",)]
+
+
+def test_follow_up_sessao():
+    """Testa follow-up: 1 chamada ao LLM, refaz tools com erro ou tecnologia nova (offline)."""
+    armazem = ArmazemSessoes(":memory:")
+    armazem.salvar(Sessao("s1", resultados_tools={
+        "analisar_demanda_salarial": {"args": {"area": "SRE"}, "resultado": {"data": {"amostra": 10}}},
+        "sugerir_certificacoes_tendencia": {"args": {"tecnologia": "Nuvem"}, "resultado": {"error": {"status": "error"}}},
+    }))
+    demanda = mock.Mock(return_value={"data": {"amostra": 20}})
+    certs = mock.Mock(return_value={"data": {"tecnologia": "Nuvem"}})
+    router = {"analisar_demanda_salarial": demanda, "sugerir_certificacoes_tendencia": certs}
+    llm = _LLMFalso(
+        AIMessage(content=_BULLETS),
+        AIMessage(content=_BULLETS),
+        AIMessage(content="", tool_calls=[{"name": "analisar_demanda_salarial", "args": {"area": "DevOps"}, "id": "1"}]),
+        AIMessage(content=_BULLETS),
+    )
+    executor = LCReActExecutor(llm, [], router)
+
+    with mock.patch.object(agent_langchain, "obter_armazem_sessoes", return_value=armazem):
+        # Resultado com erro é refeito antes da única chamada ao LLM; demanda é reaproveitada
+        assert executor.invoke({"input": "E o salário?", "session_id": "s1"})["output"] == _BULLETS
+        assert len(llm.chamadas) == 1 and demanda.call_count == 0
+        certs.assert_called_once_with(tecnologia="Nuvem")
+
+        # Tecnologia informada diferente da guardada: refaz só certificações
+        executor.invoke({"input": "E Kubernetes?", "session_id": "s1", "tecnologia": "Kubernetes"})
+        certs.assert_called_with(tecnologia="Kubernetes")
+        assert demanda.call_count == 0 and len(llm.chamadas) == 2
+
+        # Dados que a sessão não tem: o LLM chama a tool e faz mais um turno
+        executor.invoke({"input": "E DevOps?", "session_id": "s1"})
+        demanda.assert_called_once_with(area="DevOps")
+        assert len(llm.chamadas) == 4
+
+    sessao = armazem.carregar("s1")
+    assert sessao.resultados_tools["sugerir_certificacoes_tendencia"]["args"] == {"tecnologia": "Kubernetes"}
+    assert sessao.resultados_tools["analisar_demanda_salarial"]["args"] == {"area": "DevOps"}
+    assert len(sessao.historico) == 6
+
+
 def main():
-    """Executa todos os testes."""
+    """Executa todos os testes (funções test_*), na ordem do arquivo."""
     print("\n" + "=" * 60)
-    print("SMOKE TESTS - Tools do Agente")
+    print("TESTES - Tools do Agente")
     print("=" * 60)
     
     resultados = []
-    
-    # Teste 1
-    try:
-        resultados.append(("Demanda Salarial", test_demanda_salarial()))
-    except Exception as e:
-        print(f"❌ Exceção: {e}")
-        resultados.append(("Demanda Salarial", False))
-    
-    # Teste 2
-    try:
-        resultados.append(("Certificações", test_certificacoes()))
-    except Exception as e:
-        print(f"❌ Exceção: {e}")
-        resultados.append(("Certificações", False))
+    testes = [(nome, f) for nome, f in globals().items() if nome.startswith("test_") and callable(f)]
+    for nome, teste in testes:
+        # Smoke tests retornam True/False; os offline só falham levantando exceção
+        try:
+            resultados.append((nome, teste() is not False))
+        except Exception as e:
+            print(f"❌ {nome}: {type(e).__name__}: {e}")
+            resultados.append((nome, False))
     
     # Resumo
     print("\n" + "=" * 60)
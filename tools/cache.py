@@ -0,0 +1,143 @@
+"""
+Cache com TTL, thread-safe, opcionalmente persistido em SQLite.
+Entradas expiradas continuam disponíveis para leitura "stale"
+(stale-while-revalidate) até serem substituídas ou despejadas.
+Com `caminho`, o cache sobrevive ao processo: o aquecedor de cache
+(`python -m tools.cache_warmer`) renova entradas que a CLI lê depois.
+"""
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Hashable, Optional
+
+
+@dataclass
+class EntradaCache:
+    """Valor armazenado com seus instantes de criação e expiração (time.time)."""
+    valor: Any
+    criado_em: float
+    expira_em: float
+
+    @property
+    def expirado(self) -> bool:
+        return time.time() >= self.expira_em
+
+    @property
+    def idade(self) -> float:
+        return time.time() - self.criado_em
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    expira_em REAL NOT NULL
+);
+"""
+
+
+class CacheTTL:
+    """
+    Cache LRU limitado por número de itens, com TTL por entrada.
+
+    Leituras devolvem cópias: alterar o valor retornado não afeta o cache.
+    Com `caminho`, cada escrita também vai para o SQLite (valores devem ser
+    serializáveis em JSON); leituras que não acham entrada válida em memória
+    consultam o arquivo, que pode ter sido renovado por outro processo.
+    """
+
+    def __init__(self, ttl_segundos: float, max_itens: int = 1024, caminho: Optional[str] = None):
+        self.ttl_segundos = ttl_segundos
+        self.max_itens = max_itens
+        self.caminho = caminho
+        self._itens: "OrderedDict[Hashable, EntradaCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Abre o SQLite na primeira leitura/escrita (chamar com o lock)."""
+        if self._conn is None:
+            Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def _chave_texto(chave: Hashable) -> str:
+        return json.dumps(chave, ensure_ascii=False)
+
+    def _ler_disco(self, chave: Hashable) -> Optional[EntradaCache]:
+        linha = self._conexao().execute(
+            "SELECT valor, criado_em, expira_em FROM cache WHERE chave = ?", (self._chave_texto(chave),)
+        ).fetchone()
+        if linha is None:
+            return None
+        return EntradaCache(valor=json.loads(linha[0]), criado_em=linha[1], expira_em=linha[2])
+
+    def _guardar_memoria(self, chave: Hashable, entrada: EntradaCache) -> None:
+        self._itens[chave] = entrada
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna (uma cópia do) valor se existir e ainda estiver dentro do TTL."""
+        entrada = self.obter_entrada(chave)
+        if entrada is None or entrada.expirado:
+            return None
+        return entrada.valor
+
+    def obter_entrada(self, chave: Hashable) -> Optional[EntradaCache]:
+        """Retorna (uma cópia da) entrada mesmo se expirada (leitura stale)."""
+        with self._lock:
+            entrada = self._itens.get(chave)
+            if self.caminho and (entrada is None or entrada.expirado):
+                do_disco = self._ler_disco(chave)
+                if do_disco is not None and (entrada is None or do_disco.criado_em > entrada.criado_em):
+                    entrada = do_disco
+                    self._guardar_memoria(chave, entrada)
+            if entrada is None:
+                return None
+            self._itens.move_to_end(chave)
+            return EntradaCache(copy.deepcopy(entrada.valor), entrada.criado_em, entrada.expira_em)
+
+    def definir(self, chave: Hashable, valor: Any, ttl_segundos: Optional[float] = None) -> None:
+        agora = time.time()
+        ttl = self.ttl_segundos if ttl_segundos is None else ttl_segundos
+        entrada = EntradaCache(valor=copy.deepcopy(valor), criado_em=agora, expira_em=agora + ttl)
+        with self._lock:
+            self._guardar_memoria(chave, entrada)
+            if self.caminho:
+                conn = self._conexao()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (chave, valor, criado_em, expira_em) VALUES (?, ?, ?, ?)",
+                        (self._chave_texto(chave), json.dumps(valor, ensure_ascii=False), agora, agora + ttl),
+                    )
+                    # Mantém no arquivo só as `max_itens` entradas mais recentes
+                    conn.execute(
+                        "DELETE FROM cache WHERE chave NOT IN "
+                        "(SELECT chave FROM cache ORDER BY criado_em DESC LIMIT ?)",
+                        (self.max_itens,),
+                    )
+
+    def remover(self, chave: Hashable) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+            if self.caminho:
+                conn = self._conexao()
+                with conn:
+                    conn.execute("DELETE FROM cache WHERE chave = ?", (self._chave_texto(chave),))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._itens)
@@ -0,0 +1,218 @@
+"""
+Aquecedor de cache em background.
+Mantém quentes as consultas mais frequentes (ou uma lista configurada)
+das duas tools, renovando-as antes do TTL expirar.
+
+Os caches são persistidos no diretório de dados, então o aquecedor pode
+rodar como processo à parte e a CLI aproveita o que ele renovou:
+
+    python -m tools.cache_warmer            # loop até Ctrl+C
+    python -m tools.cache_warmer --uma-vez  # um ciclo (ex: cron)
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from tools import certs_cloud, demanda_salarios
+from tools.indice_certs import carregar_indice
+from tools.serpapi_quota import PRIORIDADE_REFRESH, obter_limitador
+from tools.vagas_store import obter_store
+
+
+class AquecedorCache:
+    """
+    Agendador que renova o cache das tools antes de expirar.
+
+    Candidatos de demanda = áreas configuradas + top N mais consultadas.
+    A frequência vem do store local, onde a tool de demanda registra cada
+    consulta (inclusive acertos de cache), então um aquecedor em processo à
+    parte vê as consultas da CLI; `registrar_consulta`/`instrumentar` somam
+    contagens em memória às do store. Cada ciclo gasta no
+    máximo `max_creditos_por_ciclo` créditos da SerpAPI, nunca consome a
+    `reserva_creditos` diária deixada para chamadas interativas e roda no
+    máximo `concorrencia` renovações em paralelo.
+
+    O cache de certificações é por provedor (independe da tecnologia),
+    então renovar os provedores mantém quentes todas as tecnologias. Com o
+    índice offline disponível a tool nem consulta esse cache, e os
+    provedores não são renovados.
+    """
+
+    def __init__(
+        self,
+        areas: Optional[List[str]] = None,
+        local: str = "Brasil",
+        top_n: int = 20,
+        janela_frequencia: float = 7 * 86400,
+        intervalo: float = 300.0,
+        antecedencia: float = 600.0,
+        max_creditos_por_ciclo: int = 10,
+        reserva_creditos: int = 5,
+        concorrencia: int = 2,
+    ):
+        self.areas_configuradas = [(area, local) for area in (areas or [])]
+        self.top_n = top_n
+        self.janela_frequencia = janela_frequencia
+        self.intervalo = intervalo
+        self.antecedencia = antecedencia
+        self.max_creditos_por_ciclo = max_creditos_por_ciclo
+        self.reserva_creditos = reserva_creditos
+        self.concorrencia = max(concorrencia, 1)
+
+        self._frequencia: Counter = Counter()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Frequência de consultas
+    # ------------------------------------------------------------------
+
+    def registrar_consulta(self, area: str, local: str = "Brasil") -> None:
+        with self._lock:
+            self._frequencia[(area.strip(), local.strip())] += 1
+
+    def instrumentar(self, tool_router: Dict[str, Callable[..., Any]]) -> Dict[str, Callable[..., Any]]:
+        """Retorna um router que registra as consultas de demanda antes de delegar."""
+        router = dict(tool_router)
+        original = tool_router.get("analisar_demanda_salarial")
+        if original is not None:
+            def _demanda(area: str, local: str = "Brasil", **kwargs):
+                self.registrar_consulta(area, local)
+                return original(area=area, local=local, **kwargs)
+            router["analisar_demanda_salarial"] = _demanda
+        return router
+
+    def _mais_consultadas_store(self) -> List[Tuple[str, str]]:
+        """Top N do store (consultas de qualquer processo na janela); vazio se o store falhar."""
+        try:
+            return obter_store().mais_consultadas(self.top_n, desde=time.time() - self.janela_frequencia)
+        except Exception as e:
+            print(f"[WARN] Não foi possível ler a frequência de consultas do store: {e}")
+            return []
+
+    def _candidatos(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            mais_consultadas = [chave for chave, _ in self._frequencia.most_common(self.top_n)]
+        mais_consultadas += self._mais_consultadas_store()
+        vistos = set()
+        candidatos = []
+        for area, local in self.areas_configuradas + mais_consultadas:
+            chave = (area.lower(), local.lower())
+            if chave not in vistos:
+                vistos.add(chave)
+                candidatos.append((area, local))
+        return candidatos
+
+    def _creditos_disponiveis(self) -> int:
+        status = obter_limitador().status()
+        livres = self.max_creditos_por_ciclo
+        if status["limite_diario"] > 0:
+            livres = min(livres, status["limite_diario"] - status["creditos_dia"] - self.reserva_creditos)
+        if status["limite_mensal"] > 0:
+            livres = min(livres, status["limite_mensal"] - status["creditos_mes"] - self.reserva_creditos)
+        return max(livres, 0)
+
+    # ------------------------------------------------------------------
+    # Ciclo de aquecimento
+    # ------------------------------------------------------------------
+
+    def executar_ciclo(self) -> Dict[str, Any]:
+        """Renova o que está expirando; retorna um resumo do ciclo."""
+        limite = time.time() + self.antecedencia
+        expirando = []
+        for area, local in self._candidatos():
+            expira_em = demanda_salarios.expiracao_cache(area, local)
+            if expira_em is None or expira_em <= limite:
+                expirando.append((expira_em or 0.0, area, local))
+        # Renova primeiro o que expira antes
+        expirando.sort()
+        creditos = self._creditos_disponiveis()
+        selecionados = [(area, local) for _, area, local in expirando[:creditos]]
+        # Com índice offline, a tool de certificações não faz scraping
+        provedores = [] if carregar_indice() is not None else certs_cloud.provedores_expirando(self.antecedencia)
+
+        resumo = {"demanda_renovadas": 0, "demanda_puladas": len(expirando) - len(selecionados),
+                  "provedores_renovados": 0}
+        if not selecionados and not provedores:
+            return resumo
+
+        with ThreadPoolExecutor(max_workers=self.concorrencia, thread_name_prefix="aquecedor") as pool:
+            futuros_demanda = [
+                pool.submit(
+                    demanda_salarios.analisar_demanda_salarial,
+                    area=area, local=local,
+                    prioridade=PRIORIDADE_REFRESH, forcar_atualizacao=True,
+                )
+                for area, local in selecionados
+            ]
+            futuros_certs = [pool.submit(certs_cloud.revalidar_provedor, p) for p in provedores]
+
+            for futuro in futuros_demanda:
+                try:
+                    if "data" in futuro.result():
+                        resumo["demanda_renovadas"] += 1
+                except Exception as e:
+                    print(f"[WARN] Aquecimento de demanda falhou: {e}")
+            resumo["provedores_renovados"] = sum(1 for f in futuros_certs if f.result())
+
+        print(f"[INFO] Aquecimento de cache: {resumo}")
+        return resumo
+
+    def _loop(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self.executar_ciclo()
+            except Exception as e:
+                print(f"[WARN] Erro no ciclo de aquecimento: {e}")
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self) -> None:
+        """Inicia o agendador em uma thread daemon."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="aquecedor-cache", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def areas_configuradas() -> List[str]:
+    """Lê a lista de áreas populares de CACHE_AREAS_POPULARES (separadas por ';')."""
+    bruto = os.getenv("CACHE_AREAS_POPULARES", "")
+    return [area.strip() for area in bruto.split(";") if area.strip()]
+
+
+def main() -> None:
+    """Roda o aquecedor como processo de longa duração (ou um único ciclo)."""
+    parser = argparse.ArgumentParser(description="Aquecedor do cache persistido das tools")
+    parser.add_argument("--uma-vez", action="store_true", help="Executa um único ciclo e sai")
+    parser.add_argument("--intervalo", type=float, default=300.0, help="Segundos entre ciclos (default: 300)")
+    parser.add_argument("--max-creditos", type=int, default=10, help="Créditos da SerpAPI por ciclo (default: 10)")
+    args = parser.parse_args()
+
+    aquecedor = AquecedorCache(
+        areas=areas_configuradas(), intervalo=args.intervalo, max_creditos_por_ciclo=args.max_creditos
+    )
+    if not aquecedor.areas_configuradas:
+        print("[INFO] CACHE_AREAS_POPULARES vazio: renovando só as áreas mais consultadas e os provedores")
+    if args.uma_vez:
+        aquecedor.executar_ciclo()
+        return
+    try:
+        aquecedor._loop()
+    except KeyboardInterrupt:
+        print("\n[INFO] Aquecedor interrompido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Canonicalização de empresas e cidades para a agregação de demanda.
+Normaliza caixa, acentos e sufixos societários, aplica uma tabela de
+aliases e interna cada nome canônico como um id inteiro compacto, para
+que contagem e mescla entre páginas, locais e histórico operem em ints.
+"""
+
+import heapq
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+
+_NAO_ALFANUM = re.compile(r"[^a-z0-9]+")
+_PARENTESES = re.compile(r"\(.*?\)")
+
+# Sufixos removidos do fim do nome da empresa (já normalizados)
+SUFIXOS_CORPORATIVOS = (
+    "s a", "sa", "ltda", "me", "epp", "eireli", "inc", "llc", "ltd", "corp",
+    "corporation", "co", "company", "gmbh", "plc", "do brasil", "brasil",
+)
+# Sufixos de país: só saem se o que sobra não for uma palavra genérica ("Banco do Brasil")
+_SUFIXOS_PAIS = {"do brasil", "brasil"}
+_NOMES_GENERICOS = {
+    "banco", "grupo", "companhia", "cia", "empresa", "industria", "industrias",
+    "seguros", "seguradora", "telecom", "instituto", "construtora", "correios",
+}
+
+# Chave normalizada → nome de exibição
+ALIASES_EMPRESAS = {
+    "itau": "Itaú Unibanco",
+    "itau unibanco": "Itaú Unibanco",
+    "banco itau": "Itaú Unibanco",
+    "banco do brasil": "Banco do Brasil",
+    "nu pagamentos": "Nubank",
+    "nubank": "Nubank",
+    "bradesco": "Bradesco",
+    "banco bradesco": "Bradesco",
+    "santander": "Santander",
+    "banco santander": "Santander",
+    "mercado livre": "Mercado Livre",
+    "mercadolivre": "Mercado Livre",
+    "mercadolibre": "Mercado Livre",
+    "accenture": "Accenture",
+    "ibm": "IBM",
+    "international business machines": "IBM",
+}
+
+ALIASES_CIDADES = {
+    "sao paulo": "São Paulo",
+    "sp": "São Paulo",
+    "rio de janeiro": "Rio de Janeiro",
+    "rio": "Rio de Janeiro",
+    "rj": "Rio de Janeiro",
+    "belo horizonte": "Belo Horizonte",
+    "bh": "Belo Horizonte",
+    "brasilia": "Brasília",
+    "florianopolis": "Florianópolis",
+    "porto alegre": "Porto Alegre",
+    "curitiba": "Curitiba",
+    "recife": "Recife",
+    "campinas": "Campinas",
+    "remoto": "Remoto",
+    "remote": "Remoto",
+    "home office": "Remoto",
+    "anywhere": "Remoto",
+    "qualquer lugar": "Remoto",
+    "em qualquer lugar": "Remoto",
+}
+
+# Locais que são só o país: não identificam cidade
+_SO_PAIS = {"brasil", "brazil"}
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Minúsculas, sem acentos, pontuação colapsada em espaço ("" se vazio)."""
+    if not texto:
+        return ""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return _NAO_ALFANUM.sub(" ", sem_acento.lower()).strip()
+
+
+def _remover_um_sufixo(chave: str) -> Optional[str]:
+    """Chave sem o último sufixo societário; None se não houver sufixo removível."""
+    for sufixo in SUFIXOS_CORPORATIVOS:
+        if chave.endswith(" " + sufixo):
+            resto = chave[: -len(sufixo) - 1].rstrip()
+            if sufixo in _SUFIXOS_PAIS and resto in _NOMES_GENERICOS:
+                # O país faz parte do nome: não tenta o sufixo mais curto ("Seguros do Brasil"
+                # viraria "seguros do" ao remover só "brasil")
+                return None
+            return resto
+    return None
+
+
+class IndiceCanonico:
+    """
+    Interna nomes canônicos como ids inteiros (0, 1, 2, ...), thread-safe.
+    O nome de exibição é o do alias ou, sem alias, a primeira grafia vista.
+
+    Os ids valem pelo processo inteiro (registros e contadores guardam ids),
+    então a tabela de nomes canônicos cresce com os nomes distintos vistos; o
+    atalho por grafia bruta é só um cache e é limitado a `max_grafias`.
+    """
+
+    def __init__(self, aliases: Dict[str, str], remover_sufixos: bool = False, max_grafias: int = 100_000):
+        self._aliases = aliases
+        self._exibicao = {normalizar_texto(nome): nome for nome in aliases.values()}
+        self._remover_sufixos = remover_sufixos
+        self.max_grafias = max_grafias
+        self._ids_por_chave: Dict[str, int] = {}
+        self._ids_por_bruto: Dict[str, int] = {}
+        self._nomes: List[str] = []
+        self._lock = threading.Lock()
+
+    def chave(self, nome: str) -> str:
+        """Chave canônica (normalizada, sem sufixos, com alias resolvido)."""
+        chave = normalizar_texto(nome)
+        alias = self._aliases.get(chave)
+        # Um sufixo por vez, conferindo o alias a cada passo: "banco do brasil s a"
+        # para em "banco do brasil" em vez de seguir até "banco"
+        while alias is None and self._remover_sufixos:
+            sem_sufixo = _remover_um_sufixo(chave)
+            if not sem_sufixo:
+                break
+            chave = sem_sufixo
+            alias = self._aliases.get(chave)
+        return normalizar_texto(alias) if alias else chave
+
+    def id(self, nome: Optional[str]) -> Optional[int]:
+        """Id interno do nome, criando um novo se for a primeira vez; None se vazio."""
+        if not nome:
+            return None
+        # Caminho rápido: mesma grafia já vista
+        id_ = self._ids_por_bruto.get(nome)
+        if id_ is not None:
+            return id_
+
+        chave = self.chave(nome)
+        if not chave:
+            return None
+        with self._lock:
+            id_ = self._ids_por_chave.get(chave)
+            if id_ is None:
+                id_ = len(self._nomes)
+                self._ids_por_chave[chave] = id_
+                self._nomes.append(self._exibicao.get(chave) or nome.strip())
+            if len(self._ids_por_bruto) >= self.max_grafias:
+                self._ids_por_bruto.clear()
+            self._ids_por_bruto[nome] = id_
+        return id_
+
+    def nome(self, id_: int) -> str:
+        return self._nomes[id_]
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+
+class ContadorIds:
+    """
+    Contagem esparsa por id (dict id → contagem), sem chaves de string.
+    O custo é proporcional aos ids vistos nesta contagem, não ao total de
+    nomes já internados no processo.
+    """
+
+    __slots__ = ("_contagens",)
+
+    def __init__(self):
+        self._contagens: Dict[int, int] = {}
+
+    def adicionar(self, id_: Optional[int], quantidade: int = 1) -> None:
+        if id_ is None:
+            return
+        self._contagens[id_] = self._contagens.get(id_, 0) + quantidade
+
+    def mesclar(self, outro: "ContadorIds") -> None:
+        for id_, quantidade in outro._contagens.items():
+            self.adicionar(id_, quantidade)
+
+    def total(self) -> int:
+        return sum(self._contagens.values())
+
+    def top_k(self, k: int) -> List[Tuple[int, int]]:
+        """Top k (id, contagem) via heap: O(n log k), sem ordenar tudo."""
+        return heapq.nlargest(k, self._contagens.items(), key=lambda item: item[1])
+
+
+def extrair_cidade(localizacao: Optional[str]) -> Optional[str]:
+    """Extrai a cidade de strings como "São Paulo, SP, Brasil" ou "Qualquer lugar"."""
+    if not localizacao:
+        return None
+    primeira = _PARENTESES.sub("", localizacao.split(",")[0]).strip()
+    if not primeira or normalizar_texto(primeira) in _SO_PAIS:
+        return None
+    return primeira
+
+
+INDICE_EMPRESAS = IndiceCanonico(ALIASES_EMPRESAS, remover_sufixos=True)
+INDICE_CIDADES = IndiceCanonico(ALIASES_CIDADES)
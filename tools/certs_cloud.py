@@ -3,9 +3,21 @@ Tool 2: Sugestão de certificações em tendência via scraping.
 Extrai certificações de páginas oficiais: AWS, Microsoft Azure, Google Cloud.
 """
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
 import requests
 from bs4 import BeautifulSoup
-from typing import Dict, Any, List
+
+from tools import perfil
+from tools.cache import CacheTTL
+from tools.dados import caminho_dados
+from tools.circuit_breaker import CircuitBreaker
+from tools.indice_certs import carregar_indice
+from tools.metricas import CACHE_CONSULTAS, PROVEDOR_REQUISICOES, medir_tool, resultado_requisicao
+from tools.prazo import PrazoEsgotadoError, tempo_restante
 
 
 # Skills curadas por tecnologia (lista interna fixa)
@@ -17,183 +29,306 @@ SKILLS_MAP = {
 }
 
 
-def _parse_aws(html: str) -> List[Dict[str, str]]:
+def _extrair_aws(html: str) -> List[Dict[str, str]]:
     """
-    Parse da página de certificações AWS.
+    Certificações encontradas na página da AWS.
     Foca em Architect, Developer, SysOps.
     """
     soup = BeautifulSoup(html, 'html.parser')
     certs = []
     
-    try:
-        # AWS usa estruturas variadas; busca por links com palavras-chave
-        keywords = ['architect', 'developer', 'sysops', 'engineer']
+    # AWS usa estruturas variadas; busca por links com palavras-chave
+    keywords = ['architect', 'developer', 'sysops', 'engineer']
+    
+    # Busca todos os links
+    for link in soup.find_all('a', href=True):
+        texto = link.get_text(strip=True).lower()
+        href = link['href']
         
-        # Busca todos os links
-        for link in soup.find_all('a', href=True):
-            texto = link.get_text(strip=True).lower()
-            href = link['href']
+        # Filtra certificações relevantes
+        if any(kw in texto for kw in keywords) and 'certification' in texto.lower():
+            # Monta URL absoluta
+            if href.startswith('/'):
+                href = f"https://aws.amazon.com{href}"
             
-            # Filtra certificações relevantes
-            if any(kw in texto for kw in keywords) and 'certification' in texto.lower():
-                # Monta URL absoluta
-                if href.startswith('/'):
-                    href = f"https://aws.amazon.com{href}"
-                
-                nome = link.get_text(strip=True)
-                certs.append({
-                    "provedor": "AWS",
-                    "nome": nome,
-                    "url": href
-                })
-        
-        # Se parsing detalhado falhar, retorna certificações core conhecidas
-        if not certs:
-            certs = [{
+            nome = link.get_text(strip=True)
+            certs.append({
                 "provedor": "AWS",
-                "nome": "AWS Certified Solutions Architect - Associate",
-                "url": "https://aws.amazon.com/certification/certified-solutions-architect-associate/"
-            }]
-    
-    except Exception as e:
-        print(f"[WARN] Erro ao parsear AWS: {e}")
-        # Fallback para certificação core
-        certs = [{
-            "provedor": "AWS",
-            "nome": "AWS Certified Solutions Architect - Associate",
-            "url": "https://aws.amazon.com/certification/"
-        }]
+                "nome": nome,
+                "url": href
+            })
     
-    return certs[:1]  # Retorna top 1
+    return certs
 
 
-def _parse_microsoft(html: str) -> List[Dict[str, str]]:
+def _extrair_microsoft(html: str) -> List[Dict[str, str]]:
     """
-    Parse da página de certificações Microsoft Azure.
+    Certificações encontradas na página da Microsoft Azure.
     Foca em Azure Administrator, Developer, Architect.
     """
     soup = BeautifulSoup(html, 'html.parser')
     certs = []
     
-    try:
-        keywords = ['azure administrator', 'azure developer', 'azure architect', 'az-']
+    keywords = ['azure administrator', 'azure developer', 'azure architect', 'az-']
+    
+    for link in soup.find_all('a', href=True):
+        texto = link.get_text(strip=True).lower()
+        href = link['href']
         
-        for link in soup.find_all('a', href=True):
-            texto = link.get_text(strip=True).lower()
-            href = link['href']
+        if any(kw in texto for kw in keywords):
+            if href.startswith('/'):
+                href = f"https://learn.microsoft.com{href}"
+            elif not href.startswith('http'):
+                href = f"https://learn.microsoft.com/certifications/{href}"
             
-            if any(kw in texto for kw in keywords):
-                if href.startswith('/'):
-                    href = f"https://learn.microsoft.com{href}"
-                elif not href.startswith('http'):
-                    href = f"https://learn.microsoft.com/certifications/{href}"
-                
-                nome = link.get_text(strip=True)
-                certs.append({
-                    "provedor": "Microsoft",
-                    "nome": nome,
-                    "url": href
-                })
-        
-        if not certs:
-            certs = [{
+            nome = link.get_text(strip=True)
+            certs.append({
                 "provedor": "Microsoft",
-                "nome": "Microsoft Certified: Azure Administrator Associate",
-                "url": "https://learn.microsoft.com/certifications/azure-administrator/"
-            }]
-    
-    except Exception as e:
-        print(f"[WARN] Erro ao parsear Microsoft: {e}")
-        certs = [{
-            "provedor": "Microsoft",
-            "nome": "Microsoft Certified: Azure Administrator Associate",
-            "url": "https://learn.microsoft.com/certifications/"
-        }]
+                "nome": nome,
+                "url": href
+            })
     
-    return certs[:1]
+    return certs
 
 
-def _parse_gcp(html: str) -> List[Dict[str, str]]:
+def _extrair_gcp(html: str) -> List[Dict[str, str]]:
     """
-    Parse da página de certificações Google Cloud.
+    Certificações encontradas na página do Google Cloud.
     Foca em Cloud Architect, Cloud Engineer, Cloud Developer.
     """
     soup = BeautifulSoup(html, 'html.parser')
     certs = []
     
-    try:
-        keywords = ['cloud architect', 'cloud engineer', 'cloud developer']
+    keywords = ['cloud architect', 'cloud engineer', 'cloud developer']
+    
+    for link in soup.find_all('a', href=True):
+        texto = link.get_text(strip=True).lower()
+        href = link['href']
         
-        for link in soup.find_all('a', href=True):
-            texto = link.get_text(strip=True).lower()
-            href = link['href']
+        if any(kw in texto for kw in keywords) and 'certification' in href.lower():
+            if href.startswith('/'):
+                href = f"https://cloud.google.com{href}"
             
-            if any(kw in texto for kw in keywords) and 'certification' in href.lower():
-                if href.startswith('/'):
-                    href = f"https://cloud.google.com{href}"
-                
-                nome = link.get_text(strip=True)
-                certs.append({
-                    "provedor": "Google Cloud",
-                    "nome": nome,
-                    "url": href
-                })
-        
-        if not certs:
-            certs = [{
+            nome = link.get_text(strip=True)
+            certs.append({
                 "provedor": "Google Cloud",
-                "nome": "Professional Cloud Architect",
-                "url": "https://cloud.google.com/certification/cloud-architect"
-            }]
+                "nome": nome,
+                "url": href
+            })
     
+    return certs
+
+
+# Certificação core conhecida por provedor, usada quando o parsing não encontra nada
+CERTS_CORE = {
+    "aws": {
+        "provedor": "AWS",
+        "nome": "AWS Certified Solutions Architect - Associate",
+        "url": "https://aws.amazon.com/certification/certified-solutions-architect-associate/"
+    },
+    "microsoft": {
+        "provedor": "Microsoft",
+        "nome": "Microsoft Certified: Azure Administrator Associate",
+        "url": "https://learn.microsoft.com/certifications/azure-administrator/"
+    },
+    "gcp": {
+        "provedor": "Google Cloud",
+        "nome": "Professional Cloud Architect",
+        "url": "https://cloud.google.com/certification/cloud-architect"
+    },
+}
+
+_EXTRATORES = {
+    "aws": _extrair_aws,
+    "microsoft": _extrair_microsoft,
+    "gcp": _extrair_gcp,
+}
+
+
+def _extrair_seguro(provedor: str, html: str) -> List[Dict[str, str]]:
+    """Extrai as certificações da página; erro de parsing vira lista vazia."""
+    try:
+        return _EXTRATORES[provedor](html)
     except Exception as e:
-        print(f"[WARN] Erro ao parsear Google Cloud: {e}")
-        certs = [{
-            "provedor": "Google Cloud",
-            "nome": "Professional Cloud Architect",
-            "url": "https://cloud.google.com/certification"
-        }]
-    
-    return certs[:1]
+        print(f"[WARN] Erro ao parsear {provedor}: {e}")
+        return []
 
 
-def sugerir_certificacoes_tendencia(tecnologia: str = "Nuvem") -> Dict[str, Any]:
+# URLs das páginas oficiais
+URLS_PROVEDORES = {
+    "aws": "https://aws.amazon.com/certification/",
+    "microsoft": "https://learn.microsoft.com/certifications/browse/",
+    "gcp": "https://cloud.google.com/learn/certification"
+}
+
+# Timeout máximo por provedor
+TIMEOUT_PROVEDOR = 15
+
+# Último resultado bom por provedor (catálogos mudam pouco: 24h de validade)
+CERTS_CACHE_TTL = 24 * 3600
+_cache_provedores = CacheTTL(
+    ttl_segundos=CERTS_CACHE_TTL, max_itens=len(URLS_PROVEDORES),
+    caminho=caminho_dados("certs_cache.db", "CERTS_CACHE_PATH"),
+)
+
+# Um circuito por provedor: após falhas seguidas, para de esperar o timeout
+_disjuntores = {
+    provedor: CircuitBreaker(provedor, limiar_falhas=2, tempo_recuperacao=300.0)
+    for provedor in URLS_PROVEDORES
+}
+
+_executor_revalidacao = ThreadPoolExecutor(
+    max_workers=len(URLS_PROVEDORES), thread_name_prefix="certs-revalidacao"
+)
+_revalidando: set = set()
+_revalidando_lock = threading.Lock()
+
+
+def _coletar_provedor(provedor: str, timeout: float = TIMEOUT_PROVEDOR) -> List[Dict[str, str]]:
     """
-    Sugere certificações em tendência via scraping de páginas oficiais.
+    Baixa e parseia a página de um provedor.
+    Atualiza o circuito e o cache; propaga a exceção em caso de falha.
+    Se a página não trouxer nenhuma certificação, retorna a core conhecida
+    do provedor, mas não a guarda no cache (não veio da rede).
+    """
+    disjuntor = _disjuntores[provedor]
+    try:
+        response = requests.get(URLS_PROVEDORES[provedor], timeout=timeout, headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        })
+        response.raise_for_status()
+    except Exception as e:
+        disjuntor.registrar_falha()
+        PROVEDOR_REQUISICOES.inc(provedor, resultado_requisicao(e))
+        raise
+    disjuntor.registrar_sucesso()
+
+    with perfil.etapa(f"parse HTML {provedor}"):
+        certs = _extrair_seguro(provedor, response.text)[:1]
+    if not certs:
+        PROVEDOR_REQUISICOES.inc(provedor, "fallback")
+        print(f"[WARN] Nenhuma certificação encontrada na página de {provedor}; usando a core conhecida")
+        return [dict(CERTS_CORE[provedor])]
+
+    PROVEDOR_REQUISICOES.inc(provedor, "ok")
+    _cache_provedores.definir(provedor, certs)
+    return certs
+
+
+def _agendar_revalidacao(provedor: str) -> None:
+    """Revalida o cache de um provedor em background (no máximo uma por vez)."""
+    with _revalidando_lock:
+        if provedor in _revalidando:
+            return
+        # Circuito aberto: só tenta de novo quando liberar a sonda meio-aberta
+        if not _disjuntores[provedor].permite_chamada():
+            return
+        _revalidando.add(provedor)
+
+    def _tarefa():
+        try:
+            _coletar_provedor(provedor)
+        except Exception as e:
+            print(f"[WARN] Revalidação em background de {provedor} falhou: {e}")
+        finally:
+            with _revalidando_lock:
+                _revalidando.discard(provedor)
+
+    _executor_revalidacao.submit(_tarefa)
+
+
+def provedores_expirando(antecedencia: float) -> List[str]:
+    """Provedores sem cache ou cujo cache expira nos próximos `antecedencia` segundos."""
+    limite = time.time() + antecedencia
+    expirando = []
+    for provedor in URLS_PROVEDORES:
+        entrada = _cache_provedores.obter_entrada(provedor)
+        if entrada is None or entrada.expira_em <= limite:
+            expirando.append(provedor)
+    return expirando
+
+
+def revalidar_provedor(provedor: str) -> bool:
+    """Atualiza o cache de um provedor agora (respeitando o circuito). Retorna sucesso."""
+    if not _disjuntores[provedor].permite_chamada():
+        return False
+    try:
+        _coletar_provedor(provedor)
+        # Resultado de fallback não entra no cache: não conta como revalidado
+        entrada = _cache_provedores.obter_entrada(provedor)
+        return entrada is not None and not entrada.expirado
+    except Exception as e:
+        print(f"[WARN] Falha ao revalidar {provedor}: {e}")
+        return False
+
+
+@medir_tool("sugerir_certificacoes_tendencia")
+def sugerir_certificacoes_tendencia(tecnologia: str = "Nuvem", ao_vivo: bool = False) -> Dict[str, Any]:
+    """
+    Sugere certificações em tendência a partir das páginas oficiais.
+    
+    Por padrão responde do índice offline (`tools/indice_certs.py`), sem
+    nenhuma chamada de rede. Com `ao_vivo=True`, ou sem índice disponível,
+    faz scraping das páginas.
+    
+    Stale-while-revalidate por provedor: resultado dentro do TTL é servido
+    sem rede; resultado expirado é servido na hora e revalidado em background.
+    Com o circuito do provedor aberto e sem cache, o provedor é pulado.
     
     Args:
         tecnologia: Tecnologia foco (ex: "Nuvem", "DevOps", "Dados")
+        ao_vivo: Ignora o índice offline e faz scraping
     
     Returns:
         dict: {"data": {...}} ou {"error": {...}}
     """
-    # URLs das páginas oficiais
-    urls = {
-        "aws": "https://aws.amazon.com/certification/",
-        "microsoft": "https://learn.microsoft.com/certifications/browse/",
-        "gcp": "https://cloud.google.com/learn/certification"
-    }
+    # Skills em alta (curadoria interna)
+    skills = SKILLS_MAP.get(tecnologia, SKILLS_MAP["Nuvem"])
+    
+    indice = None if ao_vivo else carregar_indice()
+    if indice is not None:
+        return {
+            "data": {
+                "tecnologia": tecnologia,
+                "certificacoes": indice.buscar(tecnologia),
+                "skills_em_alta": skills,
+                "fonte": "Páginas oficiais (AWS/Microsoft/Google Cloud)",
+                "origem": f"indice_offline ({indice.gerado_em})"
+            }
+        }
     
     todas_certs = []
     erros = []
     
-    # Scraping de cada provedor
-    for provedor, url in urls.items():
+    # Coleta de cada provedor
+    for provedor in URLS_PROVEDORES:
+        entrada = _cache_provedores.obter_entrada(provedor)
+        
+        if entrada is not None:
+            CACHE_CONSULTAS.inc("certs", "stale" if entrada.expirado else "hit")
+            todas_certs.extend(entrada.valor)
+            if entrada.expirado:
+                _agendar_revalidacao(provedor)
+            continue
+        CACHE_CONSULTAS.inc("certs", "miss")
+        
+        # Prazo antes do circuito: permite_chamada() pode reservar a sonda meio-aberta
         try:
-            response = requests.get(url, timeout=15, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            response.raise_for_status()
-            html = response.text
-            
-            if provedor == "aws":
-                certs = _parse_aws(html)
-            elif provedor == "microsoft":
-                certs = _parse_microsoft(html)
-            else:  # gcp
-                certs = _parse_gcp(html)
-            
-            todas_certs.extend(certs)
+            timeout = tempo_restante(TIMEOUT_PROVEDOR)
+        except PrazoEsgotadoError:
+            erros.append(f"{provedor}: prazo da requisição esgotado")
+            PROVEDOR_REQUISICOES.inc(provedor, "prazo")
+            print(f"[WARN] Prazo esgotado, pulando {provedor}")
+            continue
+        
+        if not _disjuntores[provedor].permite_chamada():
+            erros.append(f"{provedor}: circuito aberto")
+            PROVEDOR_REQUISICOES.inc(provedor, "circuito_aberto")
+            print(f"[WARN] Circuito aberto para {provedor}, pulando chamada")
+            continue
+        
+        try:
+            todas_certs.extend(_coletar_provedor(provedor, timeout))
             
         except requests.exceptions.Timeout:
             erros.append(f"{provedor}: timeout")
@@ -215,15 +350,13 @@ def sugerir_certificacoes_tendencia(tecnologia: str = "Nuvem") -> Dict[str, Any]
             }
         }
     
-    # Skills em alta (curadoria interna)
-    skills = SKILLS_MAP.get(tecnologia, SKILLS_MAP["Nuvem"])
-    
     return {
         "data": {
             "tecnologia": tecnologia,
             "certificacoes": todas_certs,
             "skills_em_alta": skills,
-            "fonte": "Páginas oficiais (AWS/Microsoft/Google Cloud)"
+            "fonte": "Páginas oficiais (AWS/Microsoft/Google Cloud)",
+            "origem": "scraping"
         }
     }
 
@@ -0,0 +1,70 @@
+"""
+Circuit breaker simples (fechado → aberto → meio-aberto) por provedor.
+Evita esperar o timeout inteiro de um site que está lento ou bloqueando.
+"""
+
+import threading
+import time
+
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class CircuitBreaker:
+    """
+    Abre após `limiar_falhas` falhas consecutivas. Depois de
+    `tempo_recuperacao` segundos libera UMA chamada de sonda (meio-aberto):
+    sucesso fecha o circuito, falha reabre e reinicia a contagem de tempo.
+    """
+
+    def __init__(self, nome: str, limiar_falhas: int = 3, tempo_recuperacao: float = 300.0):
+        self.nome = nome
+        self.limiar_falhas = limiar_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+        self._estado = FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._sonda_em_andamento = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            return self._estado
+
+    def permite_chamada(self) -> bool:
+        """
+        Indica se a chamada pode ser feita agora.
+        Em meio-aberto, reserva a única sonda: quem recebe True DEVE
+        registrar sucesso ou falha ao final.
+        """
+        with self._lock:
+            if self._estado == FECHADO:
+                return True
+            if self._estado == ABERTO and time.monotonic() - self._aberto_em >= self.tempo_recuperacao:
+                self._estado = MEIO_ABERTO
+                self._sonda_em_andamento = False
+            if self._estado == MEIO_ABERTO and not self._sonda_em_andamento:
+                self._sonda_em_andamento = True
+                return True
+            return False
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            if self._estado != FECHADO:
+                print(f"[INFO] Circuito de {self.nome} fechado novamente")
+            self._estado = FECHADO
+            self._falhas = 0
+            self._sonda_em_andamento = False
+
+    def registrar_falha(self) -> None:
+        with self._lock:
+            self._falhas += 1
+            self._sonda_em_andamento = False
+            if self._estado == MEIO_ABERTO or self._falhas >= self.limiar_falhas:
+                if self._estado != ABERTO:
+                    print(f"[WARN] Circuito de {self.nome} aberto após {self._falhas} falha(s)")
+                self._estado = ABERTO
+                self._aberto_em = time.monotonic()
@@ -0,0 +1,44 @@
+"""
+Diretório de dados persistentes do agente (cota da SerpAPI, vagas, sessões).
+Resolvido a partir do diretório do projeto, e não do diretório corrente,
+para que execuções de lugares diferentes compartilhem o mesmo estado.
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+DIRETORIO_PROJETO = Path(__file__).resolve().parent.parent
+
+# Os caminhos são resolvidos no import dos módulos que os usam: o .env do projeto
+# precisa estar carregado antes, qualquer que seja a ordem de import ou o diretório
+# corrente (CLI, aquecedor de cache)
+load_dotenv(DIRETORIO_PROJETO / ".env")
+
+
+# <projeto>/.cache (pode ser sobrescrito com AGENTE_DADOS_DIR no .env)
+DIRETORIO_DADOS_PADRAO = DIRETORIO_PROJETO / ".cache"
+
+
+def diretorio_dados() -> Path:
+    """Diretório de dados: AGENTE_DADOS_DIR se definido, senão <projeto>/.cache."""
+    configurado = os.getenv("AGENTE_DADOS_DIR")
+    return Path(configurado).expanduser().resolve() if configurado else DIRETORIO_DADOS_PADRAO
+
+
+def caminho_dados(nome: str, variavel: Optional[str] = None) -> str:
+    """
+    Caminho absoluto de um arquivo de dados.
+
+    Args:
+        nome: nome do arquivo dentro do diretório de dados
+        variavel: variável de ambiente que sobrescreve o caminho; se relativo,
+            é resolvido a partir do diretório de dados
+    """
+    configurado = os.getenv(variavel) if variavel else None
+    if configurado:
+        caminho = Path(configurado).expanduser()
+        return str(caminho if caminho.is_absolute() else diretorio_dados() / caminho)
+    return str(diretorio_dados() / nome)
@@ -0,0 +1,91 @@
+"""
+Detecção de vagas quase-duplicadas (mesma vaga sindicada em vários sites).
+Fingerprint xxhash de empresa/título/local/salário normalizados; o índice
+de fingerprints é compartilhado no processo e consulta o histórico local.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import xxhash
+
+from tools.canonico import normalizar_texto
+
+
+def fingerprint_vaga(
+    empresa: Optional[str],
+    titulo: Optional[str],
+    localizacao: Optional[str],
+    salario: Optional[str] = None,
+) -> int:
+    """
+    Fingerprint de 64 bits da vaga.
+    Usa só a cidade do local e só os dígitos do salário, que são as partes
+    estáveis entre os sites que republicam a mesma vaga.
+    """
+    cidade = (localizacao or "").split(",")[0]
+    digitos_salario = "".join(ch for ch in (salario or "") if ch.isdigit())
+    chave = "\x1f".join((normalizar_texto(empresa), normalizar_texto(titulo), normalizar_texto(cidade), digitos_salario))
+    return xxhash.xxh64_intdigest(chave.encode("utf-8"))
+
+
+class IndiceFingerprints:
+    """
+    Fingerprint → job_id canônico (o primeiro visto), compartilhado entre
+    chamadas, páginas e locais. Limitado (LRU) em memória; `consultar`
+    (ex: o store de vagas) resolve fingerprints vistos em execuções anteriores.
+    """
+
+    def __init__(
+        self,
+        max_itens: int = 200_000,
+        consultar: Optional[Callable[[int], Optional[str]]] = None,
+    ):
+        self.max_itens = max_itens
+        self._consultar = consultar
+        self._canonicos: "OrderedDict[int, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def canonico(self, fingerprint: int, job_id: str) -> str:
+        """job_id canônico da vaga; registra `job_id` se o fingerprint é inédito."""
+        with self._lock:
+            canonico = self._canonicos.get(fingerprint)
+            if canonico is not None:
+                self._canonicos.move_to_end(fingerprint)
+                return canonico
+        canonico = self._consultar(fingerprint) if self._consultar is not None else None
+        with self._lock:
+            # Outra thread pode ter registrado o fingerprint enquanto o store era consultado
+            canonico = self._canonicos.setdefault(fingerprint, canonico or job_id)
+            self._canonicos.move_to_end(fingerprint)
+            while len(self._canonicos) > self.max_itens:
+                self._canonicos.popitem(last=False)
+            return canonico
+
+
+class DeduplicadorVagas:
+    """
+    Deduplicação de uma análise: cada vaga (job_id canônico) conta uma vez.
+    Com um `IndiceFingerprints` compartilhado, cópias sindicadas da mesma
+    vaga recebem o mesmo job_id em qualquer chamada, página ou local, e
+    por isso também são gravadas uma única vez no histórico.
+    """
+
+    def __init__(self, indice: Optional[IndiceFingerprints] = None, max_itens: int = 50_000):
+        self.indice = indice if indice is not None else IndiceFingerprints(max_itens)
+        self.max_itens = max_itens
+        self.removidas = 0
+        self._vistos: "OrderedDict[str, None]" = OrderedDict()
+
+    def registrar(self, fingerprint: int, job_id: Optional[str] = None) -> Optional[str]:
+        """Retorna o job_id canônico da vaga, ou None se ela já foi contada nesta análise."""
+        canonico = self.indice.canonico(fingerprint, job_id or f"fp:{fingerprint:016x}")
+        if canonico in self._vistos:
+            self._vistos.move_to_end(canonico)
+            self.removidas += 1
+            return None
+        self._vistos[canonico] = None
+        if len(self._vistos) > self.max_itens:
+            self._vistos.popitem(last=False)
+        return canonico
@@ -3,15 +3,113 @@ Tool 1: Análise de demanda salarial via SerpAPI (Google Jobs).
 Realiza chamadas reais à API e agrega dados de vagas e salários.
 """
 
+import math
 import os
 import statistics
-from typing import Dict, Any, List, Optional
+import time
+from array import array
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import requests
 from dotenv import load_dotenv
 
+from tools import perfil
+from tools.cache import CacheTTL
+from tools.dados import caminho_dados
+from tools.canonico import (
+    INDICE_CIDADES,
+    INDICE_EMPRESAS,
+    ContadorIds,
+    IndiceCanonico,
+    extrair_cidade,
+)
+from tools.dedup import DeduplicadorVagas, IndiceFingerprints, fingerprint_vaga
+from tools.metricas import CACHE_CONSULTAS, PROVEDOR_REQUISICOES, medir_tool, resultado_requisicao
+from tools.prazo import PrazoEsgotadoError, tempo_restante, verificar_prazo
+from tools.serpapi_quota import (
+    OrcamentoEsgotadoError,
+    PRIORIDADE_INTERATIVA,
+    PRIORIDADE_REFRESH,
+    obter_limitador,
+)
+from tools.serpapi_stream import iterar_jobs
+from tools.vagas_store import obter_store
+
 load_dotenv()
 
 
+# Cache de resultados agregados por (área, local): vagas mudam rápido, 1h de validade.
+# Persistido no diretório de dados: o aquecedor de cache renova entradas que a CLI lê
+DEMANDA_CACHE_TTL = 3600
+_cache_demanda = CacheTTL(
+    ttl_segundos=DEMANDA_CACHE_TTL, max_itens=512,
+    caminho=caminho_dados("demanda_cache.db", "DEMANDA_CACHE_PATH"),
+)
+
+
+# Timeouts máximos da requisição HTTP e da espera na fila da SerpAPI
+TIMEOUT_HTTP = 30
+TIMEOUT_FILA = 30
+
+# Amostragem adaptativa: pagina até o IC da mediana ficar estreito (largura relativa à mediana)
+CONFIANCA_IC = 0.95
+ADAPTATIVO_LARGURA_ALVO = 0.15
+ADAPTATIVO_MAX_PAGINAS = 5
+
+# Leitura da resposta em streaming: tamanho do chunk e do lote gravado no store
+TAMANHO_CHUNK_STREAM = 64 * 1024
+LOTE_PERSISTENCIA = 500
+
+
+class RespostaSerpApiError(Exception):
+    """Resposta 200 da SerpAPI com a chave `error` no corpo (ex: chave inválida, busca falhou)."""
+
+
+# `error` que a SerpAPI devolve para uma busca sem vagas: é página vazia, não falha
+_ERRO_SEM_RESULTADOS = "hasn't returned any results"
+
+
+def _job_id_no_historico(fingerprint: int) -> Optional[str]:
+    """job_id já gravado no store para o fingerprint; falhas do store não interrompem a tool."""
+    try:
+        return obter_store().job_id_por_fingerprint(fingerprint)
+    except Exception as e:
+        print(f"[WARN] Não foi possível consultar fingerprints no store: {e}")
+        return None
+
+
+def _registrar_consulta(area: str, local: str) -> None:
+    """Conta a consulta no store (o aquecedor de cache lê de lá); falhas não interrompem a tool."""
+    try:
+        obter_store().registrar_consulta(area, local)
+    except Exception as e:
+        print(f"[WARN] Não foi possível registrar a consulta no store: {e}")
+
+
+# Fingerprints vistos no processo (e no histórico): a mesma vaga sindicada recebe
+# o mesmo job_id em qualquer chamada, página ou local
+_fingerprints = IndiceFingerprints(consultar=_job_id_no_historico)
+
+
+def _chave_cache(
+    area: str, local: str, max_paginas: int = 1, largura_alvo: Optional[float] = None
+) -> Tuple[Any, ...]:
+    """
+    Chave do resultado em cache. O modo padrão (1 página, sem amostragem adaptativa)
+    usa só (área, local), a chave que `expiracao_cache` e o aquecedor renovam; outros
+    modos amostram mais vagas e ganham chaves próprias.
+    """
+    chave: Tuple[Any, ...] = (area.strip().lower(), local.strip().lower())
+    if max_paginas != 1 or largura_alvo is not None:
+        chave += (max_paginas, largura_alvo)
+    return chave
+
+
+def expiracao_cache(area: str, local: str = "Brasil") -> Optional[float]:
+    """Instante (time.time) em que o cache de (área, local) expira, ou None se ausente."""
+    entrada = _cache_demanda.obter_entrada(_chave_cache(area, local))
+    return entrada.expira_em if entrada is not None else None
+
+
 def _extrair_salario_mensal(salary_info: str) -> Optional[float]:
     """
     Extrai e normaliza salário mensal de strings variadas.
@@ -47,26 +145,233 @@ def _extrair_salario_mensal(salary_info: str) -> Optional[float]:
         return None
 
 
-def _contar_top_items(items: List[str], top_n: int = 3) -> List[str]:
-    """Retorna os top N itens mais frequentes."""
-    from collections import Counter
-    if not items:
-        return []
-    contagem = Counter(items)
-    return [item for item, _ in contagem.most_common(top_n)]
+def _contar_top_items(contador: ContadorIds, indice: IndiceCanonico, top_n: int = 3) -> List[str]:
+    """Retorna os nomes canônicos dos top N ids mais frequentes."""
+    return [indice.nome(id_) for id_, _ in contador.top_k(top_n)]
+
+
+def _ordem_ic_mediana(n: int, confianca: float = CONFIANCA_IC) -> Optional[int]:
+    """
+    Maior r tal que [x(r), x(n-r+1)] cobre a mediana com a confiança pedida
+    (estatísticas de ordem, cobertura 1 - 2·P(Bin(n, 1/2) <= r-1)); None se n é pequeno demais.
+    """
+    alfa = 1 - confianca
+    log_total = n * math.log(2)
+    acumulado = 0.0
+    r = 0
+    for i in range(n // 2 + 1):
+        acumulado += math.exp(
+            math.lgamma(n + 1) - math.lgamma(i + 1) - math.lgamma(n - i + 1) - log_total
+        )
+        if 2 * acumulado > alfa:
+            break
+        r = i + 1
+    return r or None
+
+
+def intervalo_mediana(
+    salarios_ordenados: Sequence[float], confianca: float = CONFIANCA_IC
+) -> Optional[Tuple[float, float]]:
+    """IC da mediana a partir dos salários já ordenados; None se a amostra é pequena demais."""
+    n = len(salarios_ordenados)
+    r = _ordem_ic_mediana(n, confianca)
+    if r is None:
+        return None
+    return salarios_ordenados[r - 1], salarios_ordenados[n - r]
+
+
+def _largura_ic(salarios: Sequence[float]) -> Optional[float]:
+    """Largura do IC da mediana relativa à própria mediana; None sem amostra suficiente."""
+    ordenados = sorted(salarios)
+    intervalo = intervalo_mediana(ordenados)
+    if intervalo is None:
+        return None
+    mediana = statistics.median(ordenados)
+    return (intervalo[1] - intervalo[0]) / mediana if mediana else math.inf
+
+
+def _montar_resultado(
+    area: str,
+    local: str,
+    amostra_total: int,
+    salarios: Sequence[float],
+    empresas: ContadorIds,
+    cidades: ContadorIds,
+    observacoes_extra: Optional[List[str]] = None,
+    duplicatas_removidas: int = 0,
+) -> Dict[str, Any]:
+    """Calcula percentis, tops e observações a partir das vagas extraídas."""
+    observacoes = list(observacoes_extra or [])
+    if duplicatas_removidas:
+        observacoes.append(f"{duplicatas_removidas} vagas duplicadas (republicadas em outros sites) removidas")
+    
+    if amostra_total == 0:
+        observacoes.insert(0, "Nenhuma vaga encontrada para esta busca")
+        return {
+            "data": {
+                "area": area,
+                "local": local,
+                "amostra": 0,
+                "vagas_com_salario": 0,
+                "salarios_mensais": {"p25": None, "p50": None, "p75": None},
+                "ic_mediana": None,
+                "principais_empresas": [],
+                "principais_cidades": [],
+                "observacoes": "; ".join(observacoes),
+                "duplicatas_removidas": duplicatas_removidas,
+                "fonte": "Google Jobs via SerpAPI"
+            }
+        }
+    
+    # Calcular estatísticas
+    vagas_com_salario = len(salarios)
+    
+    percentis = {"p25": None, "p50": None, "p75": None}
+    ic_mediana = None
+    if len(salarios) >= 3:
+        salarios_sorted = sorted(salarios)
+        percentis["p25"] = round(statistics.quantiles(salarios_sorted, n=4)[0], 2)
+        percentis["p50"] = round(statistics.median(salarios_sorted), 2)
+        percentis["p75"] = round(statistics.quantiles(salarios_sorted, n=4)[2], 2)
+        intervalo = intervalo_mediana(salarios_sorted)
+        if intervalo is not None:
+            ic_mediana = {
+                "inferior": round(intervalo[0], 2),
+                "superior": round(intervalo[1], 2),
+                "confianca": CONFIANCA_IC,
+            }
+    elif len(salarios) > 0:
+        # Para amostras pequenas, usa mediana como referência
+        percentis["p50"] = round(statistics.median(salarios), 2)
+    
+    # Top empresas e cidades
+    top_empresas = _contar_top_items(empresas, INDICE_EMPRESAS, 3)
+    top_cidades = _contar_top_items(cidades, INDICE_CIDADES, 3)
+    
+    # Observações
+    if vagas_com_salario == 0:
+        observacoes.append("Nenhuma vaga com salário explícito encontrada")
+    elif vagas_com_salario < amostra_total * 0.3:
+        observacoes.append(f"Apenas {vagas_com_salario}/{amostra_total} vagas com salário explícito")
+    
+    if len(salarios) < 5:
+        observacoes.append("Amostra pequena, percentis podem não ser representativos")
+    
+    observacoes_texto = "; ".join(observacoes) if observacoes else "Dados coletados com sucesso"
+    
+    return {
+        "data": {
+            "area": area,
+            "local": local,
+            "amostra": amostra_total,
+            "vagas_com_salario": vagas_com_salario,
+            "salarios_mensais": percentis,
+            "ic_mediana": ic_mediana,
+            "principais_empresas": top_empresas,
+            "principais_cidades": top_cidades,
+            "observacoes": observacoes_texto,
+            "duplicatas_removidas": duplicatas_removidas,
+            "fonte": "Google Jobs via SerpAPI"
+        }
+    }
+
+
+def _reservar_credito(limitador: Any, prioridade: int) -> Optional[Dict[str, Any]]:
+    """Reserva um crédito da SerpAPI; retorna um dict de erro se não conseguir."""
+    try:
+        limitador.adquirir(prioridade, timeout=tempo_restante(TIMEOUT_FILA))
+        return None
+    except PrazoEsgotadoError as e:
+        return _erro_prazo(e)
+    except OrcamentoEsgotadoError as e:
+        return {
+            "error": {
+                "status": "budget_exhausted",
+                "message": "Orçamento de créditos da SerpAPI esgotado",
+                "details": str(e)
+            }
+        }
+    except TimeoutError as e:
+        return {
+            "error": {
+                "status": "error",
+                "message": "Fila da SerpAPI congestionada",
+                "details": str(e)
+            }
+        }
+
+
+def _erro_prazo(e: Exception) -> Dict[str, Any]:
+    return {
+        "error": {
+            "status": "deadline_exceeded",
+            "message": "Prazo da requisição esgotado",
+            "details": str(e)
+        }
+    }
+
+
+def _filtro_data_publicacao(segundos: float) -> str:
+    """Menor filtro `date_posted` do Google Jobs que cobre o intervalo não coletado."""
+    dias = segundos / 86400
+    if dias <= 1:
+        return "date_posted:today"
+    if dias <= 3:
+        return "date_posted:3days"
+    if dias <= 7:
+        return "date_posted:week"
+    return "date_posted:month"
 
 
-def analisar_demanda_salarial(area: str, local: str = "Brasil") -> Dict[str, Any]:
+@medir_tool("analisar_demanda_salarial")
+def analisar_demanda_salarial(
+    area: str,
+    local: str = "Brasil",
+    prioridade: int = PRIORIDADE_INTERATIVA,
+    forcar_atualizacao: bool = False,
+    janela_dias: Optional[int] = None,
+    max_paginas: Optional[int] = None,
+    adaptativo: bool = False,
+    largura_alvo: float = ADAPTATIVO_LARGURA_ALVO,
+) -> Dict[str, Any]:
     """
     Analisa demanda e salários para uma área de TI via Google Jobs (SerpAPI).
     
     Args:
         area: Área de TI (ex: "Engenheiro de DevOps")
         local: Localização (default: "Brasil")
+        prioridade: Prioridade na fila da SerpAPI (interativa < batch < refresh)
+        forcar_atualizacao: Ignora o cache e consulta a SerpAPI
+        janela_dias: Se informado, agrega as vagas dos últimos N dias do
+            histórico local, buscando na SerpAPI só o intervalo não coletado
+        max_paginas: Páginas da SerpAPI a ler, cada uma custa um crédito
+            (default: 1, ou ADAPTATIVO_MAX_PAGINAS no modo adaptativo)
+        adaptativo: Pagina só até o IC 95% da mediana salarial ficar mais
+            estreito que `largura_alvo` (fração da mediana) ou até `max_paginas`
+        largura_alvo: Largura relativa alvo do IC no modo adaptativo
     
     Returns:
         dict: {"data": {...}} ou {"error": {...}}
+        Se o orçamento de créditos acabou, serve o último resultado em cache
+        (mesmo expirado) ou retorna erro com status "budget_exhausted".
     """
+    if janela_dias:
+        return _analisar_historico(area, local, janela_dias, prioridade)
+    
+    if max_paginas is None:
+        max_paginas = ADAPTATIVO_MAX_PAGINAS if adaptativo else 1
+    if not adaptativo:
+        largura_alvo = None
+    chave = _chave_cache(area, local, max_paginas, largura_alvo)
+    # Só o modo padrão é renovado pelo aquecedor; as renovações dele não contam como consulta
+    if len(chave) == 2 and prioridade != PRIORIDADE_REFRESH:
+        _registrar_consulta(area, local)
+    if not forcar_atualizacao:
+        cacheado = _cache_demanda.obter(chave)
+        CACHE_CONSULTAS.inc("demanda", "miss" if cacheado is None else "hit")
+        if cacheado is not None:
+            return cacheado
+    
     api_key = os.getenv("SERPAPI_API_KEY")
     
     if not api_key:
@@ -78,6 +383,263 @@ def analisar_demanda_salarial(area: str, local: str = "Brasil") -> Dict[str, Any
             }
         }
     
+    # Respeita ritmo e orçamento de créditos da SerpAPI
+    limitador = obter_limitador()
+    erro = _reservar_credito(limitador, prioridade)
+    if erro is not None:
+        entrada = _cache_demanda.obter_entrada(chave)
+        motivo = {
+            "budget_exhausted": "orçamento da SerpAPI esgotado",
+            "deadline_exceeded": "prazo da requisição esgotado",
+        }.get(erro["error"]["status"])
+        if motivo and entrada is not None:
+            CACHE_CONSULTAS.inc("demanda", "stale")
+            dados = dict(entrada.valor["data"])
+            idade_min = int(entrada.idade // 60)
+            dados["observacoes"] = f"{dados['observacoes']}; Dados em cache de {idade_min} min ({motivo})"
+            return {"data": dados}
+        return erro
+    
+    resultado = _consultar_serpapi(
+        area, local, api_key, limitador, max_paginas=max_paginas, prioridade=prioridade,
+        largura_alvo=largura_alvo,
+    )
+    if "data" in resultado:
+        _cache_demanda.definir(chave, resultado)
+    return resultado
+
+
+def _analisar_historico(area: str, local: str, janela_dias: int, prioridade: int) -> Dict[str, Any]:
+    """Agrega a janela a partir do store local, coletando antes só o intervalo ainda não visto."""
+    store = obter_store()
+    agora = time.time()
+    ultima = store.ultima_coleta(area, local)
+    observacoes = [f"Agregado do histórico local (últimos {janela_dias} dias)"]
+    
+    if ultima is None or agora - ultima > DEMANDA_CACHE_TTL:
+        api_key = os.getenv("SERPAPI_API_KEY")
+        limitador = obter_limitador()
+        if not api_key:
+            erro = {
+                "error": {
+                    "status": "error",
+                    "message": "SERPAPI_API_KEY não configurada no .env",
+                    "details": "Configure a chave para usar esta ferramenta"
+                }
+            }
+        else:
+            erro = _reservar_credito(limitador, prioridade)
+        if erro is None:
+            filtro = _filtro_data_publicacao(agora - ultima) if ultima is not None else None
+            resultado = _consultar_serpapi(
+                area, local, api_key, limitador, filtro_data=filtro, prioridade=prioridade
+            )
+            if "error" in resultado:
+                erro = resultado
+        if erro is not None:
+            if ultima is None:
+                return erro
+            observacoes.append(f"Coleta incremental falhou ({erro['error']['message']}), usando apenas o histórico")
+    
+    # O store já devolve uma linha por fingerprint (vagas republicadas contam uma vez)
+    linhas = store.consultar_janela(area, local, agora - janela_dias * 86400)
+    empresas, cidades = ContadorIds(), ContadorIds()
+    salarios = []
+    for empresa, cidade, salario in linhas:
+        empresas.adicionar(INDICE_EMPRESAS.id(empresa))
+        cidades.adicionar(INDICE_CIDADES.id(cidade))
+        if salario:
+            salarios.append(salario)
+    return _montar_resultado(area, local, len(linhas), salarios, empresas, cidades, observacoes)
+
+
+class VagaCompacta:
+    """Só os campos agregados/persistidos de uma vaga (sem o dict cru da SerpAPI)."""
+
+    __slots__ = ("job_id", "fingerprint", "empresa", "titulo", "localizacao", "cidade_id", "salario_mensal")
+
+    def __init__(
+        self,
+        job_id: str,
+        fingerprint: int,
+        empresa: Optional[str],
+        titulo: Optional[str],
+        localizacao: Optional[str],
+        cidade_id: Optional[int],
+        salario_mensal: Optional[float],
+    ):
+        self.job_id = job_id
+        self.fingerprint = fingerprint
+        self.empresa = empresa
+        self.titulo = titulo
+        self.localizacao = localizacao
+        self.cidade_id = cidade_id
+        self.salario_mensal = salario_mensal
+
+    def como_registro(self) -> Dict[str, Any]:
+        """Formato aceito por VagasStore.registrar_vagas."""
+        return {
+            "job_id": self.job_id,
+            "fingerprint": self.fingerprint,
+            "empresa": self.empresa,
+            "titulo": self.titulo,
+            "localizacao": self.localizacao,
+            "cidade": INDICE_CIDADES.nome(self.cidade_id) if self.cidade_id is not None else None,
+            "salario_mensal": self.salario_mensal,
+        }
+
+
+class AgregadorDemanda:
+    """Agregados incrementais da amostra: contagem, salários em array e contadores por id."""
+
+    __slots__ = ("amostra", "salarios", "empresas", "cidades")
+
+    def __init__(self):
+        self.amostra = 0
+        self.salarios = array("d")
+        self.empresas = ContadorIds()
+        self.cidades = ContadorIds()
+
+    def adicionar(self, vaga: VagaCompacta, empresa_id: Optional[int]) -> None:
+        self.amostra += 1
+        self.empresas.adicionar(empresa_id)
+        self.cidades.adicionar(vaga.cidade_id)
+        if vaga.salario_mensal:
+            self.salarios.append(vaga.salario_mensal)
+
+
+def _extrair_vaga(job: Dict[str, Any], deduplicador: DeduplicadorVagas) -> Optional[Tuple[VagaCompacta, Optional[int]]]:
+    """Converte um item de jobs_results em VagaCompacta (+ id da empresa); None se duplicada."""
+    empresa = job.get("company_name", "")
+    titulo = job.get("title", "")
+    location = job.get("location", "")
+    salary_info = job.get("detected_extensions", {}).get("salary", "")
+    if not salary_info:
+        # Tenta outros campos
+        salary_info = job.get("salary", "")
+
+    # Descarta a mesma vaga republicada em outro site
+    fingerprint = fingerprint_vaga(empresa, titulo, location, str(salary_info or ""))
+    job_id = deduplicador.registrar(fingerprint, job.get("job_id"))
+    if job_id is None:
+        return None
+
+    salario_mensal = _extrair_salario_mensal(str(salary_info)) if salary_info else None
+    vaga = VagaCompacta(
+        job_id=job_id,
+        fingerprint=fingerprint,
+        empresa=empresa or None,
+        titulo=titulo or None,
+        localizacao=location or None,
+        # Empresa e cidade canônicas (ids internados)
+        cidade_id=INDICE_CIDADES.id(extrair_cidade(location)),
+        salario_mensal=salario_mensal or None,
+    )
+    return vaga, INDICE_EMPRESAS.id(empresa)
+
+
+def _persistir_vagas(vagas: List[VagaCompacta], area: str, local: str, consulta: str) -> None:
+    """Grava as vagas no store local; falhas não interrompem a tool."""
+    if not vagas:
+        return
+    try:
+        obter_store().registrar_vagas([v.como_registro() for v in vagas], area, local, consulta)
+    except Exception as e:
+        print(f"[WARN] Não foi possível persistir vagas: {e}")
+
+
+def _marcar_coleta(area: str, local: str) -> None:
+    """Marca a coleta de (área, local) no store mesmo sem vagas; falhas não interrompem a tool."""
+    try:
+        obter_store().marcar_coleta(area, local)
+    except Exception as e:
+        print(f"[WARN] Não foi possível marcar a coleta no store: {e}")
+
+
+def _ler_pagina(
+    url: str,
+    params: Dict[str, Any],
+    agregador: AgregadorDemanda,
+    deduplicador: DeduplicadorVagas,
+    area: str,
+    local: str,
+) -> Dict[str, Any]:
+    """
+    Baixa uma página em streaming e alimenta o agregador vaga a vaga,
+    persistindo em lotes. Retorna as chaves extras do topo da resposta.
+    Se o prazo da requisição acabar no meio, o que já foi lido fica no agregador.
+    Levanta RespostaSerpApiError se o corpo trouxer `error` (exceto "sem resultados",
+    tratado como página vazia) e ValueError se o JSON vier malformado; as vagas
+    lidas antes disso também ficam no agregador.
+    """
+    extras: Dict[str, Any] = {}
+    lote: List[VagaCompacta] = []
+    timeout = tempo_restante(TIMEOUT_HTTP)
+    response = None
+    try:
+        response = requests.get(url, params=params, timeout=timeout, stream=True)
+        response.raise_for_status()
+        # Leitura e parsing são intercalados no streaming: a etapa inclui a espera da rede
+        with perfil.etapa("parse JSON SerpAPI (streaming)"):
+            for job in iterar_jobs(response.iter_content(chunk_size=TAMANHO_CHUNK_STREAM), extras):
+                verificar_prazo()
+                extraida = _extrair_vaga(job, deduplicador)
+                if extraida is None:
+                    continue
+                vaga, empresa_id = extraida
+                agregador.adicionar(vaga, empresa_id)
+                lote.append(vaga)
+                if len(lote) >= LOTE_PERSISTENCIA:
+                    _persistir_vagas(lote, area, local, params["q"])
+                    lote = []
+        erro = extras.get("error")
+        if erro and _ERRO_SEM_RESULTADOS not in str(erro).lower():
+            PROVEDOR_REQUISICOES.inc("serpapi", "erro_api")
+            raise RespostaSerpApiError(erro)
+        PROVEDOR_REQUISICOES.inc("serpapi", "ok")
+        # Página lida até o fim: conta como coleta mesmo sem vagas (o histórico não
+        # volta a gastar crédito com o mesmo intervalo de uma área sem vagas novas)
+        _marcar_coleta(area, local)
+    except requests.exceptions.RequestException as e:
+        PROVEDOR_REQUISICOES.inc("serpapi", resultado_requisicao(e))
+        raise
+    except ValueError:
+        PROVEDOR_REQUISICOES.inc("serpapi", "resposta_invalida")
+        raise
+    except PrazoEsgotadoError:
+        PROVEDOR_REQUISICOES.inc("serpapi", "prazo")
+        raise
+    finally:
+        if response is not None:
+            response.close()
+        _persistir_vagas(lote, area, local, params["q"])
+    return extras
+
+
+def _consultar_serpapi(
+    area: str,
+    local: str,
+    api_key: str,
+    limitador: Any,
+    filtro_data: Optional[str] = None,
+    deduplicador: Optional[DeduplicadorVagas] = None,
+    max_paginas: int = 1,
+    prioridade: int = PRIORIDADE_INTERATIVA,
+    largura_alvo: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Faz a chamada à SerpAPI (crédito da 1ª página já reservado), persiste as vagas e agrega os resultados.
+    A resposta é lida em streaming: cada vaga vira um registro compacto e entra direto nos
+    agregados, então a memória não cresce com o número de páginas. Vagas quase-duplicadas
+    são descartadas antes de qualquer parsing.
+    
+    Com `largura_alvo`, a paginação para assim que o IC da mediana salarial, recalculado
+    a cada página, fica mais estreito que essa fração da mediana (ou em `max_paginas`).
+    """
+    deduplicador = deduplicador if deduplicador is not None else DeduplicadorVagas(_fingerprints)
+    removidas_antes = deduplicador.removidas
+    agregador = AgregadorDemanda()
+    observacoes: List[str] = []
     try:
         # Chamada à SerpAPI - Google Jobs
         url = "https://serpapi.com/search.json"
@@ -88,111 +650,91 @@ def analisar_demanda_salarial(area: str, local: str = "Brasil") -> Dict[str, Any
             "gl": "br",
             "api_key": api_key
         }
+        if filtro_data:
+            params["chips"] = filtro_data
         
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        jobs_results = data.get("jobs_results", [])
-        
-        if not jobs_results:
-            return {
-                "data": {
-                    "area": area,
-                    "local": local,
-                    "amostra": 0,
-                    "vagas_com_salario": 0,
-                    "salarios_mensais": {"p25": None, "p50": None, "p75": None},
-                    "principais_empresas": [],
-                    "principais_cidades": [],
-                    "observacoes": "Nenhuma vaga encontrada para esta busca",
-                    "fonte": "Google Jobs via SerpAPI"
-                }
-            }
-        
-        # Processar vagas
-        salarios = []
-        empresas = []
-        cidades = []
-        
-        for job in jobs_results:
-            # Extrair empresa
-            empresa = job.get("company_name", "")
-            if empresa:
-                empresas.append(empresa)
-            
-            # Extrair cidade
-            location = job.get("location", "")
-            if location:
-                # Pega primeira parte (cidade)
-                cidade = location.split(",")[0].strip()
-                if cidade:
-                    cidades.append(cidade)
-            
-            # Extrair salário
-            salary_info = job.get("detected_extensions", {}).get("salary", "")
-            if not salary_info:
-                # Tenta outros campos
-                salary_info = job.get("salary", "")
-            
-            if salary_info:
-                salario_mensal = _extrair_salario_mensal(str(salary_info))
-                if salario_mensal:
-                    salarios.append(salario_mensal)
+        paginas = 0
+        largura: Optional[float] = None
+        # Por que a paginação parou (relatado no modo adaptativo se o IC não atingir o alvo)
+        parada = f"limite de {max_paginas} página(s)"
+        try:
+            extras = _ler_pagina(url, params, agregador, deduplicador, area, local)
+            paginas = 1
+            while paginas < max_paginas:
+                if largura_alvo is not None:
+                    largura = _largura_ic(agregador.salarios)
+                    if largura is not None and largura <= largura_alvo:
+                        break
+                token = (extras.get("serpapi_pagination") or {}).get("next_page_token")
+                if not token:
+                    parada = "sem mais páginas na SerpAPI"
+                    break
+                # Cada página extra custa um crédito; sem crédito, fica com o que já foi lido
+                erro = _reservar_credito(limitador, prioridade)
+                if erro is not None:
+                    parada = {
+                        "budget_exhausted": "sem créditos da SerpAPI",
+                        "deadline_exceeded": "prazo da requisição esgotado",
+                    }.get(erro["error"]["status"], erro["error"]["message"])
+                    observacoes.append(
+                        f"Paginação interrompida após {paginas} página(s): {erro['error']['message']}"
+                    )
+                    break
+                params["next_page_token"] = token
+                try:
+                    extras = _ler_pagina(url, params, agregador, deduplicador, area, local)
+                except (requests.exceptions.RequestException, RespostaSerpApiError, ValueError) as e:
+                    # Erros HTTP e buscas com `error` não são cobrados pela SerpAPI
+                    if isinstance(e, (requests.exceptions.HTTPError, RespostaSerpApiError)):
+                        limitador.estornar()
+                    parada = f"erro na página {paginas + 1}"
+                    observacoes.append(f"Paginação interrompida após {paginas} página(s): {e}")
+                    break
+                paginas += 1
+        except PrazoEsgotadoError:
+            if agregador.amostra == 0:
+                raise
+            parada = "prazo da requisição esgotado"
+            observacoes.append(f"Leitura interrompida pelo prazo da requisição ({agregador.amostra} vagas lidas)")
+        except ValueError as e:
+            # JSON malformado na 1ª página (nas seguintes é tratado acima): fica com o que já foi lido
+            if agregador.amostra == 0:
+                raise
+            parada = "resposta malformada"
+            observacoes.append(f"Leitura interrompida por resposta malformada ({agregador.amostra} vagas lidas): {e}")
         
-        # Calcular estatísticas
-        amostra_total = len(jobs_results)
-        vagas_com_salario = len(salarios)
+        if largura_alvo is not None:
+            largura = _largura_ic(agregador.salarios)
+            if largura is None:
+                situacao = f"salários insuficientes para o IC da mediana ({parada})"
+            elif largura <= largura_alvo:
+                situacao = f"IC {CONFIANCA_IC:.0%} da mediana com largura de {largura:.0%} (alvo {largura_alvo:.0%})"
+            else:
+                situacao = (
+                    f"IC {CONFIANCA_IC:.0%} da mediana ainda com largura de {largura:.0%} "
+                    f"(alvo {largura_alvo:.0%}, {parada})"
+                )
+            observacoes.append(f"Amostragem adaptativa: {paginas} página(s), {situacao}")
         
-        percentis = {"p25": None, "p50": None, "p75": None}
-        if len(salarios) >= 3:
-            salarios_sorted = sorted(salarios)
-            percentis["p25"] = round(statistics.quantiles(salarios_sorted, n=4)[0], 2)
-            percentis["p50"] = round(statistics.median(salarios_sorted), 2)
-            percentis["p75"] = round(statistics.quantiles(salarios_sorted, n=4)[2], 2)
-        elif len(salarios) > 0:
-            # Para amostras pequenas, usa mediana como referência
-            percentis["p50"] = round(statistics.median(salarios), 2)
-        
-        # Top empresas e cidades
-        top_empresas = _contar_top_items(empresas, 3)
-        top_cidades = _contar_top_items(cidades, 3)
-        
-        # Observações
-        observacoes = []
-        if vagas_com_salario == 0:
-            observacoes.append("Nenhuma vaga com salário explícito encontrada")
-        elif vagas_com_salario < amostra_total * 0.3:
-            observacoes.append(f"Apenas {vagas_com_salario}/{amostra_total} vagas com salário explícito")
-        
-        if len(salarios) < 5:
-            observacoes.append("Amostra pequena, percentis podem não ser representativos")
-        
-        observacoes_texto = "; ".join(observacoes) if observacoes else "Dados coletados com sucesso"
-        
-        return {
-            "data": {
-                "area": area,
-                "local": local,
-                "amostra": amostra_total,
-                "vagas_com_salario": vagas_com_salario,
-                "salarios_mensais": percentis,
-                "principais_empresas": top_empresas,
-                "principais_cidades": top_cidades,
-                "observacoes": observacoes_texto,
-                "fonte": "Google Jobs via SerpAPI"
-            }
-        }
+        duplicatas = deduplicador.removidas - removidas_antes
+        return _montar_resultado(
+            area, local, agregador.amostra, agregador.salarios, agregador.empresas, agregador.cidades,
+            observacoes_extra=observacoes, duplicatas_removidas=duplicatas,
+        )
         
+    except PrazoEsgotadoError as e:
+        return _erro_prazo(e)
     except requests.exceptions.Timeout:
         return {
             "error": {
                 "status": "error",
                 "message": "Timeout na chamada à SerpAPI",
-                "details": "A API demorou muito para responder (>30s)"
+                "details": "A API não respondeu dentro do timeout/prazo da requisição"
             }
         }
     except requests.exceptions.HTTPError as e:
+        # Respostas de erro (ex: 429) não são cobradas pela SerpAPI
+        limitador.estornar()
         return {
             "error": {
                 "status": "error",
@@ -200,6 +742,15 @@ def analisar_demanda_salarial(area: str, local: str = "Brasil") -> Dict[str, Any
                 "details": str(e)
             }
         }
+    except RespostaSerpApiError as e:
+        limitador.estornar()
+        return {
+            "error": {
+                "status": "error",
+                "message": "Erro retornado pela SerpAPI",
+                "details": str(e)
+            }
+        }
     except Exception as e:
         return {
             "error": {
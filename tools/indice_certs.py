@@ -0,0 +1,270 @@
+"""
+Índice offline de certificações (snapshot versionado em JSON compacto).
+
+Construção (offline, fora do caminho do agente):
+    python -m tools.indice_certs            # catálogo base + crawl das páginas oficiais
+    python -m tools.indice_certs --sem-rede # só o catálogo base
+
+Em runtime, `sugerir_certificacoes_tendencia` consulta o snapshot sem
+nenhuma chamada de rede: termos → certificações ranqueadas.
+"""
+
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from tools.canonico import normalizar_texto
+
+
+VERSAO_INDICE = 1
+INDICE_CERTS_PATH = str(Path(__file__).with_name("certificacoes_index.json"))
+
+# Termos extras por tecnologia do SKILLS_MAP (já normalizados)
+PALAVRAS_TECNOLOGIA = {
+    "nuvem": ["cloud", "architect", "administrator"],
+    "devops": ["devops", "kubernetes", "ci cd"],
+    "dados": ["data", "database", "analytics"],
+    "ia": ["machine learning", "ai", "mlops"],
+}
+
+# Catálogo base curado: (provedor, nome, url, termos, peso)
+CATALOGO_BASE: List[Tuple[str, str, str, List[str], int]] = [
+    ("AWS", "AWS Certified Solutions Architect - Associate",
+     "https://aws.amazon.com/certification/certified-solutions-architect-associate/",
+     ["nuvem", "cloud", "architect", "arquitetura"], 3),
+    ("AWS", "AWS Certified Solutions Architect - Professional",
+     "https://aws.amazon.com/certification/certified-solutions-architect-professional/",
+     ["nuvem", "cloud", "architect", "arquitetura"], 2),
+    ("AWS", "AWS Certified Developer - Associate",
+     "https://aws.amazon.com/certification/certified-developer-associate/",
+     ["nuvem", "cloud", "developer", "desenvolvimento", "serverless"], 2),
+    ("AWS", "AWS Certified SysOps Administrator - Associate",
+     "https://aws.amazon.com/certification/certified-sysops-admin-associate/",
+     ["nuvem", "cloud", "administrator", "operacoes", "devops"], 2),
+    ("AWS", "AWS Certified DevOps Engineer - Professional",
+     "https://aws.amazon.com/certification/certified-devops-engineer-professional/",
+     ["devops", "ci cd", "automacao", "sre", "platform"], 3),
+    ("AWS", "AWS Certified Data Engineer - Associate",
+     "https://aws.amazon.com/certification/certified-data-engineer-associate/",
+     ["dados", "data", "data engineering", "etl", "analytics", "spark", "databricks"], 3),
+    ("AWS", "AWS Certified Machine Learning Engineer - Associate",
+     "https://aws.amazon.com/certification/certified-machine-learning-engineer-associate/",
+     ["ia", "ai", "machine learning", "ml", "mlops"], 3),
+    ("AWS", "AWS Certified AI Practitioner",
+     "https://aws.amazon.com/certification/certified-ai-practitioner/",
+     ["ia", "ai", "llm", "genai", "machine learning"], 2),
+    ("AWS", "AWS Certified Security - Specialty",
+     "https://aws.amazon.com/certification/certified-security-specialty/",
+     ["seguranca", "security", "cloud security"], 2),
+    ("Microsoft", "Microsoft Certified: Azure Administrator Associate (AZ-104)",
+     "https://learn.microsoft.com/credentials/certifications/azure-administrator/",
+     ["nuvem", "cloud", "azure", "administrator"], 3),
+    ("Microsoft", "Microsoft Certified: Azure Solutions Architect Expert (AZ-305)",
+     "https://learn.microsoft.com/credentials/certifications/azure-solutions-architect/",
+     ["nuvem", "cloud", "azure", "architect", "arquitetura"], 2),
+    ("Microsoft", "Microsoft Certified: Azure Developer Associate (AZ-204)",
+     "https://learn.microsoft.com/credentials/certifications/azure-developer/",
+     ["nuvem", "cloud", "azure", "developer", "desenvolvimento"], 2),
+    ("Microsoft", "Microsoft Certified: DevOps Engineer Expert (AZ-400)",
+     "https://learn.microsoft.com/credentials/certifications/devops-engineer/",
+     ["devops", "ci cd", "azure", "automacao", "sre", "platform"], 3),
+    ("Microsoft", "Microsoft Certified: Fabric Data Engineer Associate (DP-700)",
+     "https://learn.microsoft.com/credentials/certifications/fabric-data-engineer-associate/",
+     ["dados", "data", "data engineering", "etl", "spark", "analytics", "databricks"], 3),
+    ("Microsoft", "Microsoft Certified: Azure AI Engineer Associate (AI-102)",
+     "https://learn.microsoft.com/credentials/certifications/azure-ai-engineer/",
+     ["ia", "ai", "llm", "genai", "rag", "azure"], 3),
+    ("Microsoft", "Microsoft Certified: Azure Data Scientist Associate (DP-100)",
+     "https://learn.microsoft.com/credentials/certifications/azure-data-scientist/",
+     ["ia", "ai", "machine learning", "ml", "data science", "dados"], 2),
+    ("Microsoft", "Microsoft Certified: Azure Security Engineer Associate (AZ-500)",
+     "https://learn.microsoft.com/credentials/certifications/azure-security-engineer/",
+     ["seguranca", "security", "cloud security", "azure"], 2),
+    ("Google Cloud", "Professional Cloud Architect",
+     "https://cloud.google.com/learn/certification/cloud-architect",
+     ["nuvem", "cloud", "architect", "arquitetura", "gcp"], 3),
+    ("Google Cloud", "Associate Cloud Engineer",
+     "https://cloud.google.com/learn/certification/cloud-engineer",
+     ["nuvem", "cloud", "gcp", "administrator"], 2),
+    ("Google Cloud", "Professional Cloud Developer",
+     "https://cloud.google.com/learn/certification/cloud-developer",
+     ["nuvem", "cloud", "developer", "desenvolvimento", "gcp"], 2),
+    ("Google Cloud", "Professional Cloud DevOps Engineer",
+     "https://cloud.google.com/learn/certification/cloud-devops-engineer",
+     ["devops", "sre", "kubernetes", "ci cd", "gcp", "platform"], 3),
+    ("Google Cloud", "Professional Data Engineer",
+     "https://cloud.google.com/learn/certification/data-engineer",
+     ["dados", "data", "data engineering", "etl", "bigquery", "analytics", "databricks"], 3),
+    ("Google Cloud", "Professional Machine Learning Engineer",
+     "https://cloud.google.com/learn/certification/machine-learning-engineer",
+     ["ia", "ai", "machine learning", "ml", "mlops", "gcp"], 3),
+    ("Google Cloud", "Professional Cloud Security Engineer",
+     "https://cloud.google.com/learn/certification/cloud-security-engineer",
+     ["seguranca", "security", "cloud security", "gcp"], 2),
+]
+
+# Peso de um termo explícito do catálogo vs. token encontrado só no nome
+_PESO_TERMO = 3
+_PESO_TOKEN_NOME = 1
+# Tokens genéricos que não ajudam no ranking
+_TOKENS_IGNORADOS = {"aws", "certified", "microsoft", "professional", "associate", "expert", "specialty", "the"}
+
+
+# ----------------------------------------------------------------------
+# Construção
+# ----------------------------------------------------------------------
+
+def _crawl_catalogos() -> List[Dict[str, str]]:
+    """Baixa as páginas oficiais e extrai todas as certificações encontradas."""
+    import requests
+    from tools import certs_cloud
+
+    certs = []
+    for provedor, url in certs_cloud.URLS_PROVEDORES.items():
+        try:
+            response = requests.get(url, timeout=30, headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            })
+            response.raise_for_status()
+            # Só o que veio da página: a core conhecida (fallback da tool) não é dado do crawl
+            encontradas = certs_cloud._extrair_seguro(provedor, response.text)
+            if not encontradas:
+                print(f"[WARN] Nenhuma certificação na página de {provedor}, mantendo só o catálogo base")
+                continue
+            print(f"[INDICE] {provedor}: {len(encontradas)} certificações")
+            certs.extend(encontradas)
+        except Exception as e:
+            print(f"[WARN] Crawl de {provedor} falhou, mantendo só o catálogo base: {e}")
+    return certs
+
+
+def construir_indice(com_rede: bool = True) -> Dict[str, Any]:
+    """Monta o snapshot: catálogo base + (opcional) certificações vindas do crawl."""
+    certificacoes: List[Dict[str, Any]] = []
+    vistos = set()
+
+    for provedor, nome, url, termos, peso in CATALOGO_BASE:
+        certificacoes.append({"provedor": provedor, "nome": nome, "url": url,
+                              "termos": termos, "peso": peso})
+        vistos.add(normalizar_texto(nome))
+
+    if com_rede:
+        for cert in _crawl_catalogos():
+            chave = normalizar_texto(cert["nome"])
+            if chave and chave not in vistos:
+                vistos.add(chave)
+                certificacoes.append({**cert, "termos": [], "peso": 1})
+
+    # Termo → [[posição da certificação, score], ...] ordenado por score
+    postings: Dict[str, Dict[int, int]] = {}
+    for i, cert in enumerate(certificacoes):
+        for termo in cert["termos"]:
+            postings.setdefault(termo, {})[i] = _PESO_TERMO * cert["peso"]
+        for token in normalizar_texto(cert["nome"]).split():
+            if len(token) > 1 and token not in _TOKENS_IGNORADOS:
+                atual = postings.setdefault(token, {})
+                atual[i] = max(atual.get(i, 0), _PESO_TOKEN_NOME * cert["peso"])
+
+    indice = {
+        termo: sorted(([i, score] for i, score in docs.items()), key=lambda par: -par[1])
+        for termo, docs in sorted(postings.items())
+    }
+    return {
+        "versao": VERSAO_INDICE,
+        "gerado_em": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "certificacoes": [[c["provedor"], c["nome"], c["url"]] for c in certificacoes],
+        "indice": indice,
+    }
+
+
+def salvar_indice(snapshot: Dict[str, Any], caminho: str = INDICE_CERTS_PATH) -> None:
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    Path(caminho).write_text(
+        json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+
+
+# ----------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------
+
+class IndiceCertificacoes:
+    """Snapshot carregado em memória, pronto para consultas por tecnologia."""
+
+    def __init__(self, snapshot: Dict[str, Any]):
+        if snapshot.get("versao") != VERSAO_INDICE:
+            raise ValueError(f"Versão de índice incompatível: {snapshot.get('versao')}")
+        self.gerado_em: str = snapshot["gerado_em"]
+        self._certificacoes: List[List[str]] = snapshot["certificacoes"]
+        self._indice: Dict[str, List[List[int]]] = snapshot["indice"]
+
+    def _termos(self, tecnologia: str) -> List[str]:
+        normalizada = normalizar_texto(tecnologia)
+        termos = [normalizada] + normalizada.split()
+        termos += PALAVRAS_TECNOLOGIA.get(normalizada, [])
+        return [t for t in dict.fromkeys(termos) if t in self._indice]
+
+    def buscar(self, tecnologia: str, por_provedor: int = 2) -> List[Dict[str, str]]:
+        """
+        Certificações ranqueadas para a tecnologia, até `por_provedor` de cada
+        provedor. Tecnologia sem nenhum termo conhecido cai em "nuvem".
+        """
+        termos = self._termos(tecnologia) or self._termos("nuvem")
+        scores: Dict[int, int] = {}
+        for termo in termos:
+            for i, score in self._indice[termo]:
+                scores[i] = scores.get(i, 0) + score
+
+        resultado = []
+        por_provedor_usados: Dict[str, int] = {}
+        for i in sorted(scores, key=lambda i: (-scores[i], i)):
+            provedor, nome, url = self._certificacoes[i]
+            if por_provedor_usados.get(provedor, 0) >= por_provedor:
+                continue
+            por_provedor_usados[provedor] = por_provedor_usados.get(provedor, 0) + 1
+            resultado.append({"provedor": provedor, "nome": nome, "url": url})
+        return resultado
+
+
+_indice_carregado: Optional[IndiceCertificacoes] = None
+_indice_lock = threading.Lock()
+
+
+def carregar_indice() -> Optional[IndiceCertificacoes]:
+    """
+    Carrega (uma vez por processo) o snapshot de INDICE_CERTS_PATH.
+    Retorna None se o arquivo não existir ou for inválido.
+    """
+    global _indice_carregado
+    with _indice_lock:
+        if _indice_carregado is None:
+            caminho = os.getenv("INDICE_CERTS_PATH", INDICE_CERTS_PATH)
+            try:
+                snapshot = json.loads(Path(caminho).read_text(encoding="utf-8"))
+                _indice_carregado = IndiceCertificacoes(snapshot)
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                print(f"[WARN] Índice de certificações inválido ({caminho}): {e}")
+                return None
+        return _indice_carregado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o índice offline de certificações.")
+    parser.add_argument("--sem-rede", action="store_true", help="usa só o catálogo base, sem crawl")
+    parser.add_argument("--saida", default=INDICE_CERTS_PATH, help="caminho do snapshot")
+    args = parser.parse_args()
+
+    snapshot = construir_indice(com_rede=not args.sem_rede)
+    salvar_indice(snapshot, args.saida)
+    print(f"[OK] Índice v{snapshot['versao']} com {len(snapshot['certificacoes'])} certificações "
+          f"e {len(snapshot['indice'])} termos salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
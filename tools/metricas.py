@@ -0,0 +1,235 @@
+"""
+Registro de métricas em processo (contadores e histogramas de latência).
+Atualizado pelo agente e pelas tools; lido como snapshot ou exportado no
+formato texto de exposição do Prometheus / JSON ao final da execução.
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+
+# Buckets (segundos) para latência de tools e turnos do LLM
+BUCKETS_LATENCIA = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Buckets para contagens por consulta (chamadas ao LLM, tokens)
+BUCKETS_CONTAGEM = (1, 2, 3, 5, 10, 100, 1000, 2500, 5000, 10000, 25000, 50000)
+
+
+def _rotulos_texto(nomes: Sequence[str], valores: Tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{n}="{v}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Contador:
+    """Contador monotônico, opcionalmente com rótulos."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores_rotulos: str, quantidade: float = 1) -> None:
+        chave = tuple(str(v) for v in valores_rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + quantidade
+
+    def valor(self, *valores_rotulos: str) -> float:
+        return self._valores.get(tuple(str(v) for v in valores_rotulos), 0)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            itens = list(self._valores.items())
+        return [{"rotulos": dict(zip(self.rotulos, chave)), "valor": valor} for chave, valor in itens]
+
+    def exposicao(self) -> List[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [f"{self.nome}{_rotulos_texto(self.rotulos, chave)} {valor:g}" for chave, valor in itens]
+
+
+class _Serie:
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self, n_buckets: int):
+        self.contagens = [0] * n_buckets
+        self.soma = 0.0
+        self.total = 0
+
+
+class Histograma:
+    """Histograma com buckets fixos (contagens não cumulativas internamente)."""
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_LATENCIA,
+    ):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _Serie] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *valores_rotulos: str) -> None:
+        chave = tuple(str(v) for v in valores_rotulos)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = _Serie(len(self.buckets))
+            if indice < len(self.buckets):
+                serie.contagens[indice] += 1
+            serie.soma += valor
+            serie.total += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            series = [(chave, list(s.contagens), s.soma, s.total) for chave, s in self._series.items()]
+        resultado = []
+        for chave, contagens, soma, total in series:
+            acumulado, buckets = 0, {}
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                buckets[f"{limite:g}"] = acumulado
+            buckets["+Inf"] = total
+            resultado.append({
+                "rotulos": dict(zip(self.rotulos, chave)),
+                "buckets": buckets,
+                "soma": soma,
+                "contagem": total,
+            })
+        return resultado
+
+    def exposicao(self) -> List[str]:
+        linhas = []
+        for item in sorted(self.snapshot(), key=lambda i: tuple(i["rotulos"].values())):
+            chave = tuple(item["rotulos"].values())
+            for limite, acumulado in item["buckets"].items():
+                le = f'le="{limite}"'
+                linhas.append(f"{self.nome}_bucket{_rotulos_texto(self.rotulos, chave, le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos_texto(self.rotulos, chave)} {item['soma']:g}")
+            linhas.append(f"{self.nome}_count{_rotulos_texto(self.rotulos, chave)} {item['contagem']}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas nomeadas do processo (get-or-create, thread-safe)."""
+
+    def __init__(self):
+        self._metricas: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _obter(self, classe: type, nome: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, *args, **kwargs)
+            elif not isinstance(metrica, classe):
+                raise ValueError(f"Métrica {nome} já registrada como {metrica.tipo}")
+            return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self._obter(Contador, nome, ajuda, rotulos)
+
+    def histograma(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_LATENCIA,
+    ) -> Histograma:
+        return self._obter(Histograma, nome, ajuda, rotulos, buckets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual de todas as métricas, em dicts/listas serializáveis em JSON."""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return {
+            m.nome: {"tipo": m.tipo, "ajuda": m.ajuda, "series": m.snapshot()}
+            for m in metricas
+        }
+
+    def exposicao_texto(self) -> str:
+        """Formato texto de exposição do Prometheus."""
+        with self._lock:
+            metricas = sorted(self._metricas.values(), key=lambda m: m.nome)
+        linhas = []
+        for m in metricas:
+            linhas.append(f"# HELP {m.nome} {m.ajuda}")
+            linhas.append(f"# TYPE {m.nome} {m.tipo}")
+            linhas.extend(m.exposicao())
+        return "\n".join(linhas) + "\n"
+
+    def salvar(self, caminho: str) -> None:
+        """Grava as métricas (JSON se terminar em .json, senão texto) de forma atômica."""
+        destino = Path(caminho)
+        if destino.suffix == ".json":
+            conteudo = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        else:
+            conteudo = self.exposicao_texto()
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_suffix(destino.suffix + ".tmp")
+        tmp.write_text(conteudo, encoding="utf-8")
+        os.replace(tmp, destino)
+
+
+REGISTRO = RegistroMetricas()
+
+# Métricas compartilhadas entre as tools
+TOOL_CHAMADAS = REGISTRO.contador(
+    "tool_chamadas_total", "Chamadas de tools por resultado (ok/erro)", ("tool", "resultado")
+)
+TOOL_LATENCIA = REGISTRO.histograma(
+    "tool_latencia_segundos", "Latência das tools em segundos", ("tool",)
+)
+CACHE_CONSULTAS = REGISTRO.contador(
+    "cache_consultas_total", "Consultas aos caches das tools por resultado (hit/stale/miss)", ("cache", "resultado")
+)
+PROVEDOR_REQUISICOES = REGISTRO.contador(
+    "provedor_requisicoes_total", "Requisições a provedores externos por resultado", ("provedor", "resultado")
+)
+
+
+def resultado_requisicao(erro: Exception) -> str:
+    """Rótulo de resultado para uma exceção de requisição HTTP."""
+    if isinstance(erro, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(erro, requests.exceptions.HTTPError) and erro.response is not None:
+        return f"http_{erro.response.status_code}"
+    return "erro"
+
+
+def medir_tool(nome: str) -> Callable[[Callable[..., Dict[str, Any]]], Callable[..., Dict[str, Any]]]:
+    """Decorator: conta chamadas ok/erro (pelo dict retornado) e mede a latência da tool."""
+    def decorador(func: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        @functools.wraps(func)
+        def _medida(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            inicio = time.perf_counter()
+            resultado: Optional[Dict[str, Any]] = None
+            try:
+                resultado = func(*args, **kwargs)
+                return resultado
+            finally:
+                TOOL_LATENCIA.observar(time.perf_counter() - inicio, nome)
+                ok = isinstance(resultado, dict) and "error" not in resultado
+                TOOL_CHAMADAS.inc(nome, "ok" if ok else "erro")
+        return _medida
+    return decorador
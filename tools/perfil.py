@@ -0,0 +1,214 @@
+"""
+Profiling por etapa para o modo `--profile` da CLI.
+Cada etapa (setup do agente, turno do LLM, tool, parsing) roda com seu
+próprio cProfile e um diff de tracemalloc; opcionalmente, uma thread
+amostra as pilhas e gera um arquivo de pilhas colapsadas (flame graph).
+Sem perfilador ativo, `etapa()` é um contexto vazio.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+
+TOP_N = 15
+INTERVALO_AMOSTRAGEM = 0.005  # segundos entre amostras de pilha
+
+# Alocações do próprio profiling não interessam no relatório
+_FILTROS_MEMORIA = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class _Registro:
+    __slots__ = ("nome", "thread", "duracao", "funcoes", "alocacoes", "subetapa")
+
+    def __init__(self, nome: str, thread: str, subetapa: bool):
+        self.nome = nome
+        self.thread = thread
+        self.subetapa = subetapa
+        self.duracao = 0.0
+        self.funcoes = ""
+        self.alocacoes: List[str] = []
+
+
+class _Ativa:
+    __slots__ = ("nome", "profiler")
+
+    def __init__(self, nome: str, profiler: Optional[cProfile.Profile]):
+        self.nome = nome
+        self.profiler = profiler
+
+
+def _ligar(profiler: Optional[cProfile.Profile]) -> Optional[cProfile.Profile]:
+    """Liga o profiler; None se outro já estiver ativo (ex: outra thread no Python 3.12+)."""
+    if profiler is None:
+        return None
+    try:
+        profiler.enable()
+        return profiler
+    except ValueError:
+        return None
+
+
+class Perfilador:
+    """
+    Coleta cProfile + tracemalloc por etapa. Etapas aninhadas na mesma thread
+    pausam o cProfile da etapa externa: o tempo da sub-etapa aparece só nela.
+    tracemalloc é global, então alocações de etapas concorrentes se misturam.
+    """
+
+    def __init__(self, top_n: int = TOP_N, amostrar_pilhas: bool = False,
+                 intervalo: float = INTERVALO_AMOSTRAGEM):
+        self.top_n = top_n
+        self.registros: List[_Registro] = []
+        self._amostrar_pilhas = amostrar_pilhas
+        self._intervalo = intervalo
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ocorrencias: Counter = Counter()
+        self._etapas_por_thread: Dict[int, List[str]] = {}
+        self._pilhas: Counter = Counter()
+        self._parar = threading.Event()
+        self._amostrador: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._amostrar_pilhas:
+            self._amostrador = threading.Thread(target=self._amostrar, name="perfil-amostrador", daemon=True)
+            self._amostrador.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._amostrador is not None:
+            self._amostrador.join()
+        tracemalloc.stop()
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        # "#k" só no relatório: as pilhas usam o nome base para agregar as ocorrências
+        with self._lock:
+            self._ocorrencias[nome] += 1
+            nome_registro = f"{nome} #{self._ocorrencias[nome]}"
+        pilha: List[_Ativa] = self._local.__dict__.setdefault("pilha", [])
+        ident = threading.get_ident()
+        registro = _Registro(nome_registro, threading.current_thread().name, subetapa=bool(pilha))
+
+        if pilha and pilha[-1].profiler is not None:
+            pilha[-1].profiler.disable()
+        ativa = _Ativa(nome, _ligar(cProfile.Profile()))
+        pilha.append(ativa)
+        with self._lock:
+            self._etapas_por_thread.setdefault(ident, []).append(nome)
+        antes = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro.duracao = time.perf_counter() - inicio
+            if ativa.profiler is not None:
+                ativa.profiler.disable()
+            depois = tracemalloc.take_snapshot() if antes is not None and tracemalloc.is_tracing() else None
+            pilha.pop()
+            with self._lock:
+                self._etapas_por_thread[ident].pop()
+            if pilha:
+                pilha[-1].profiler = _ligar(pilha[-1].profiler)
+
+            if ativa.profiler is not None:
+                saida = io.StringIO()
+                pstats.Stats(ativa.profiler, stream=saida).sort_stats("cumulative").print_stats(self.top_n)
+                registro.funcoes = saida.getvalue().strip()
+            if depois is not None:
+                diferencas = depois.filter_traces(_FILTROS_MEMORIA).compare_to(
+                    antes.filter_traces(_FILTROS_MEMORIA), "lineno"
+                )
+                registro.alocacoes = [str(d) for d in diferencas[:self.top_n] if d.size_diff]
+            with self._lock:
+                self.registros.append(registro)
+
+    def _amostrar(self) -> None:
+        """Amostra as pilhas das threads que estão dentro de alguma etapa."""
+        while not self._parar.wait(self._intervalo):
+            quadros = sys._current_frames()
+            with self._lock:
+                etapas = {ident: list(nomes) for ident, nomes in self._etapas_por_thread.items() if nomes}
+            for ident, nomes in etapas.items():
+                quadro = quadros.get(ident)
+                funcoes = []
+                while quadro is not None:
+                    codigo = quadro.f_code
+                    funcoes.append(f"{Path(codigo.co_filename).name}:{codigo.co_name}")
+                    quadro = quadro.f_back
+                chave = ";".join([*nomes, *reversed(funcoes)]).replace(" ", "_")
+                with self._lock:
+                    self._pilhas[chave] += 1
+
+    def relatorio(self) -> str:
+        """Resumo por etapa seguido do detalhe (funções por tempo cumulativo e alocações)."""
+        with self._lock:
+            registros = list(self.registros)
+        linhas = ["RESUMO POR ETAPA (segundos, inclusive sub-etapas)"]
+        for r in sorted(registros, key=lambda r: r.duracao, reverse=True):
+            recuo = "  " if r.subetapa else ""
+            linhas.append(f"{r.duracao:9.3f}  {recuo}{r.nome}  [{r.thread}]")
+        for r in registros:
+            linhas.append("")
+            linhas.append("=" * 70)
+            linhas.append(f"ETAPA: {r.nome} — {r.duracao:.3f}s [{r.thread}]")
+            linhas.append("=" * 70)
+            linhas.append(f"-- Top {self.top_n} funções por tempo cumulativo (cProfile)")
+            linhas.append(r.funcoes or "(indisponível: outro profiler ativo nesta etapa)")
+            linhas.append(f"-- Top {self.top_n} locais de alocação (tracemalloc, diferença na etapa)")
+            linhas.extend(r.alocacoes or ["(sem alocações relevantes)"])
+        return "\n".join(linhas) + "\n"
+
+    def salvar(self, caminho_relatorio: str, caminho_pilhas: Optional[str] = None) -> None:
+        destino = Path(caminho_relatorio)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_text(self.relatorio(), encoding="utf-8")
+        if caminho_pilhas:
+            with self._lock:
+                pilhas = sorted(self._pilhas.items())
+            destino_pilhas = Path(caminho_pilhas)
+            destino_pilhas.parent.mkdir(parents=True, exist_ok=True)
+            destino_pilhas.write_text(
+                "".join(f"{pilha} {contagem}\n" for pilha, contagem in pilhas), encoding="utf-8"
+            )
+
+
+_ativo: Optional[Perfilador] = None
+
+
+def ativar(perfilador: Perfilador) -> None:
+    global _ativo
+    perfilador.iniciar()
+    _ativo = perfilador
+
+
+def desativar() -> Optional[Perfilador]:
+    global _ativo
+    perfilador, _ativo = _ativo, None
+    if perfilador is not None:
+        perfilador.parar()
+    return perfilador
+
+
+def etapa(nome: str) -> ContextManager[Any]:
+    """Contexto de profiling da etapa; vazio (custo ~zero) sem perfilador ativo."""
+    perfilador = _ativo
+    return perfilador.etapa(nome) if perfilador is not None else nullcontext()
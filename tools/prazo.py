@@ -0,0 +1,52 @@
+"""
+Prazo fim a fim de uma requisição do agente.
+O executor define o instante-limite (time.monotonic) uma vez; tools e
+chamadas HTTP usam o que resta dele como timeout, no lugar de valores fixos.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+_limite: ContextVar[Optional[float]] = ContextVar("prazo_limite", default=None)
+
+
+class PrazoEsgotadoError(Exception):
+    """O prazo da requisição acabou antes de a etapa terminar."""
+
+
+@contextmanager
+def prazo(limite: Optional[float]) -> Iterator[None]:
+    """Define o instante-limite (time.monotonic) para o bloco; None = sem prazo."""
+    token = _limite.set(limite)
+    try:
+        yield
+    finally:
+        _limite.reset(token)
+
+
+def limite_atual() -> Optional[float]:
+    return _limite.get()
+
+
+def tempo_restante(padrao: float) -> float:
+    """
+    Timeout para a próxima operação: o menor entre `padrao` e o que resta do prazo.
+    Os timeouts fixos das tools e do LLM são só tetos; com prazo da requisição,
+    vale o que restar dele se for menor. Sem prazo, retorna `padrao`.
+    Levanta PrazoEsgotadoError se o prazo já acabou.
+    """
+    limite = _limite.get()
+    if limite is None:
+        return padrao
+    restante = limite - time.monotonic()
+    if restante <= 0:
+        raise PrazoEsgotadoError("prazo da requisição esgotado")
+    return min(padrao, restante)
+
+
+def verificar_prazo() -> None:
+    """Interrompe trabalho em andamento (ex: leitura de páginas) se o prazo acabou."""
+    tempo_restante(0.0)
@@ -0,0 +1,256 @@
+"""
+Controle de cota da SerpAPI.
+Token bucket para ritmo de chamadas, orçamento diário/mensal de créditos
+com contabilidade persistida em disco e fila ordenada por prioridade.
+A contabilidade é protegida por uma trava de arquivo: CLI e aquecedor de
+cache rodando em processos separados dividem o mesmo orçamento.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from tools.dados import caminho_dados
+from tools.metricas import REGISTRO
+
+
+# Prioridades (menor valor = atendido primeiro)
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_BATCH = 10
+PRIORIDADE_REFRESH = 20
+
+# Defaults (podem ser sobrescritos via .env)
+SERPAPI_USO_PATH = caminho_dados("serpapi_uso.json")
+SERPAPI_LIMITE_DIARIO = 50
+SERPAPI_LIMITE_MENSAL = 250
+SERPAPI_TAXA_POR_SEGUNDO = 1.0
+SERPAPI_RAJADA = 3
+
+
+_creditos_usados = REGISTRO.contador(
+    "serpapi_creditos_total", "Créditos da SerpAPI consumidos neste processo", ("prioridade",)
+)
+_creditos_estornados = REGISTRO.contador(
+    "serpapi_creditos_estornados_total", "Créditos da SerpAPI devolvidos (chamadas não cobradas)"
+)
+_orcamento_esgotado = REGISTRO.contador(
+    "serpapi_orcamento_esgotado_total", "Pedidos de crédito recusados por orçamento esgotado"
+)
+
+
+class OrcamentoEsgotadoError(Exception):
+    """Créditos diários ou mensais da SerpAPI esgotados."""
+
+
+class LimitadorSerpApi:
+    """
+    Limitador thread-safe: token bucket + orçamento de créditos.
+
+    Chamadas aguardam em um heap (prioridade, ordem de chegada); apenas o
+    primeiro da fila pode consumir token, então requisições interativas
+    passam na frente de jobs batch/refresh que estejam esperando.
+    Limites <= 0 desativam o respectivo orçamento.
+    """
+
+    def __init__(
+        self,
+        taxa_por_segundo: float = SERPAPI_TAXA_POR_SEGUNDO,
+        rajada: int = SERPAPI_RAJADA,
+        limite_diario: int = SERPAPI_LIMITE_DIARIO,
+        limite_mensal: int = SERPAPI_LIMITE_MENSAL,
+        caminho_uso: str = SERPAPI_USO_PATH,
+    ):
+        self.taxa_por_segundo = max(taxa_por_segundo, 0.001)
+        self.rajada = max(rajada, 1)
+        self.limite_diario = limite_diario
+        self.limite_mensal = limite_mensal
+        self.caminho_uso = Path(caminho_uso)
+
+        self._cond = threading.Condition()
+        self._fila: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._tokens = float(self.rajada)
+        self._ultimo_refill = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Contabilidade persistente
+    # ------------------------------------------------------------------
+
+    def _carregar_uso(self) -> Dict[str, Any]:
+        """Lê o uso do disco e zera os contadores se o dia/mês virou."""
+        agora = datetime.now()
+        dia, mes = agora.strftime("%Y-%m-%d"), agora.strftime("%Y-%m")
+
+        uso: Dict[str, Any] = {}
+        try:
+            uso = json.loads(self.caminho_uso.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] Arquivo de uso da SerpAPI inválido, reiniciando contagem: {e}")
+
+        if uso.get("mes") != mes:
+            uso["mes"], uso["creditos_mes"] = mes, 0
+        if uso.get("dia") != dia:
+            uso["dia"], uso["creditos_dia"] = dia, 0
+        return uso
+
+    def _salvar_uso(self, uso: Dict[str, Any]) -> None:
+        """Grava o uso de forma atômica (tmp + replace)."""
+        try:
+            self.caminho_uso.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.caminho_uso.with_suffix(".tmp")
+            tmp.write_text(json.dumps(uso), encoding="utf-8")
+            os.replace(tmp, self.caminho_uso)
+        except Exception as e:
+            print(f"[WARN] Não foi possível gravar uso da SerpAPI: {e}")
+
+    @contextmanager
+    def _uso_exclusivo(self) -> Iterator[Dict[str, Any]]:
+        """
+        Carrega o uso com trava exclusiva entre processos (arquivo `.lock` ao lado),
+        para que leitura, verificação e gravação não se intercalem com outro processo.
+        Sem conseguir criar a trava, segue sem ela (só a trava em processo vale).
+        """
+        trava = None
+        try:
+            self.caminho_uso.parent.mkdir(parents=True, exist_ok=True)
+            trava = open(self.caminho_uso.with_suffix(".lock"), "a+b")
+            if fcntl is not None:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+            else:
+                trava.seek(0)
+                msvcrt.locking(trava.fileno(), msvcrt.LK_LOCK, 1)
+        except OSError as e:
+            print(f"[WARN] Não foi possível travar o uso da SerpAPI entre processos: {e}")
+            if trava is not None:
+                trava.close()
+                trava = None
+        try:
+            yield self._carregar_uso()
+        finally:
+            if trava is not None:
+                if fcntl is not None:
+                    fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+                else:
+                    trava.seek(0)
+                    msvcrt.locking(trava.fileno(), msvcrt.LK_UNLCK, 1)
+                trava.close()
+
+    def _verificar_orcamento(self, uso: Dict[str, Any]) -> None:
+        if self.limite_diario > 0 and uso["creditos_dia"] >= self.limite_diario:
+            raise OrcamentoEsgotadoError(
+                f"Limite diário atingido ({uso['creditos_dia']}/{self.limite_diario} créditos em {uso['dia']})"
+            )
+        if self.limite_mensal > 0 and uso["creditos_mes"] >= self.limite_mensal:
+            raise OrcamentoEsgotadoError(
+                f"Limite mensal atingido ({uso['creditos_mes']}/{self.limite_mensal} créditos em {uso['mes']})"
+            )
+
+    # ------------------------------------------------------------------
+    # Token bucket + fila por prioridade
+    # ------------------------------------------------------------------
+
+    def _reabastecer(self) -> None:
+        agora = time.monotonic()
+        decorrido = agora - self._ultimo_refill
+        self._ultimo_refill = agora
+        self._tokens = min(float(self.rajada), self._tokens + decorrido * self.taxa_por_segundo)
+
+    def adquirir(self, prioridade: int = PRIORIDADE_INTERATIVA, timeout: Optional[float] = None) -> None:
+        """
+        Bloqueia até haver token e crédito disponível e registra o consumo.
+
+        Raises:
+            OrcamentoEsgotadoError: orçamento diário/mensal esgotado
+            TimeoutError: não obteve vez na fila dentro do timeout
+        """
+        ticket = (prioridade, next(self._seq))
+        limite = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            heapq.heappush(self._fila, ticket)
+            try:
+                while True:
+                    espera: Optional[float] = None
+                    with self._uso_exclusivo() as uso:
+                        try:
+                            self._verificar_orcamento(uso)
+                        except OrcamentoEsgotadoError:
+                            _orcamento_esgotado.inc()
+                            raise
+
+                        if self._fila[0] == ticket:
+                            self._reabastecer()
+                            if self._tokens >= 1:
+                                self._tokens -= 1
+                                uso["creditos_dia"] += 1
+                                uso["creditos_mes"] += 1
+                                self._salvar_uso(uso)
+                                _creditos_usados.inc(prioridade)
+                                return
+                            espera = (1 - self._tokens) / self.taxa_por_segundo
+
+                    if limite is not None:
+                        restante = limite - time.monotonic()
+                        if restante <= 0:
+                            raise TimeoutError("Tempo esgotado aguardando vez na fila da SerpAPI")
+                        espera = restante if espera is None else min(espera, restante)
+
+                    self._cond.wait(espera)
+            finally:
+                self._fila.remove(ticket)
+                heapq.heapify(self._fila)
+                self._cond.notify_all()
+
+    def estornar(self) -> None:
+        """Devolve um crédito (ex: chamada rejeitada pela API, que não é cobrada)."""
+        with self._cond, self._uso_exclusivo() as uso:
+            uso["creditos_dia"] = max(0, uso["creditos_dia"] - 1)
+            uso["creditos_mes"] = max(0, uso["creditos_mes"] - 1)
+            self._salvar_uso(uso)
+            self._cond.notify_all()
+        _creditos_estornados.inc()
+
+    def status(self) -> Dict[str, Any]:
+        """Retorna o uso atual e os limites configurados."""
+        with self._cond:
+            uso = self._carregar_uso()
+            return {
+                **uso,
+                "limite_diario": self.limite_diario,
+                "limite_mensal": self.limite_mensal,
+                "fila": len(self._fila),
+            }
+
+
+_limitador: Optional[LimitadorSerpApi] = None
+_limitador_lock = threading.Lock()
+
+
+def obter_limitador() -> LimitadorSerpApi:
+    """Retorna o limitador do processo, configurado a partir do .env."""
+    global _limitador
+    with _limitador_lock:
+        if _limitador is None:
+            _limitador = LimitadorSerpApi(
+                taxa_por_segundo=float(os.getenv("SERPAPI_TAXA_POR_SEGUNDO", SERPAPI_TAXA_POR_SEGUNDO)),
+                rajada=int(os.getenv("SERPAPI_RAJADA", SERPAPI_RAJADA)),
+                limite_diario=int(os.getenv("SERPAPI_LIMITE_DIARIO", SERPAPI_LIMITE_DIARIO)),
+                limite_mensal=int(os.getenv("SERPAPI_LIMITE_MENSAL", SERPAPI_LIMITE_MENSAL)),
+                caminho_uso=caminho_dados("serpapi_uso.json", "SERPAPI_USO_PATH"),
+            )
+        return _limitador
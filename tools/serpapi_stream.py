@@ -0,0 +1,128 @@
+"""
+Parsing incremental da resposta JSON da SerpAPI (Google Jobs).
+Entrega cada item de `jobs_results` assim que ele chega, sem montar o
+corpo inteiro em memória; das demais chaves guarda só as pedidas.
+"""
+
+import codecs
+import json
+from typing import Dict, Any, Iterable, Iterator, Optional, Set
+
+
+# Chaves de topo (fora de jobs_results) que interessam à tool
+CHAVES_EXTRAS = {"serpapi_pagination", "error"}
+
+_ESPACOS = " \t\r\n"
+# Compacta o buffer quando a parte já consumida passa deste tamanho
+_LIMITE_COMPACTACAO = 64 * 1024
+
+
+class _Leitor:
+    """Buffer de texto alimentado por chunks de bytes, com decodificação UTF-8 incremental."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.fim = False
+
+    def _ler_mais(self) -> bool:
+        if self.fim:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.fim = True
+            self.buffer += self._decoder.decode(b"", final=True)
+            return False
+        if self.pos > _LIMITE_COMPACTACAO:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += self._decoder.decode(chunk)
+        return True
+
+    def proximo_caractere(self) -> str:
+        """Consome espaços e retorna (consumindo) o próximo caractere significativo."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                caractere = self.buffer[self.pos]
+                self.pos += 1
+                return caractere
+            if not self._ler_mais():
+                raise ValueError("JSON truncado na resposta da SerpAPI")
+
+    def espiar(self) -> str:
+        caractere = self.proximo_caractere()
+        self.pos -= 1
+        return caractere
+
+    def esperar(self, esperado: str) -> None:
+        caractere = self.proximo_caractere()
+        if caractere != esperado:
+            raise ValueError(f"JSON inesperado na resposta da SerpAPI: '{caractere}' (esperado '{esperado}')")
+
+    def valor(self) -> Any:
+        """Decodifica o próximo valor JSON completo, lendo mais chunks se necessário."""
+        self.espiar()
+        while True:
+            try:
+                valor, fim = self._json.raw_decode(self.buffer, self.pos)
+                # Número no fim do buffer pode estar cortado: só confia se houver mais texto
+                if fim < len(self.buffer) or self.fim:
+                    self.pos = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self.fim:
+                    raise
+            self._ler_mais()
+
+
+def iterar_jobs(
+    chunks: Iterable[bytes],
+    extras: Optional[Dict[str, Any]] = None,
+    chaves_extras: Set[str] = CHAVES_EXTRAS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Itera os itens de `jobs_results` de um corpo JSON entregue em chunks.
+
+    Args:
+        chunks: bytes do corpo (ex: response.iter_content(...))
+        extras: dict preenchido com as chaves de topo em `chaves_extras`
+        chaves_extras: chaves de topo a guardar; as demais são descartadas
+    """
+    extras = extras if extras is not None else {}
+    leitor = _Leitor(chunks)
+    leitor.esperar("{")
+    if leitor.espiar() == "}":
+        return
+
+    while True:
+        chave = leitor.valor()
+        leitor.esperar(":")
+
+        if chave == "jobs_results" and leitor.espiar() == "[":
+            leitor.esperar("[")
+            if leitor.espiar() == "]":
+                leitor.esperar("]")
+            else:
+                while True:
+                    yield leitor.valor()
+                    separador = leitor.proximo_caractere()
+                    if separador == "]":
+                        break
+                    if separador != ",":
+                        raise ValueError(f"JSON inesperado em jobs_results: '{separador}'")
+        else:
+            valor = leitor.valor()
+            if chave in chaves_extras:
+                extras[chave] = valor
+
+        separador = leitor.proximo_caractere()
+        if separador == "}":
+            return
+        if separador != ",":
+            raise ValueError(f"JSON inesperado na resposta da SerpAPI: '{separador}'")
@@ -0,0 +1,236 @@
+"""
+Armazenamento local (SQLite) das vagas coletadas via SerpAPI.
+Permite responder agregados históricos ("últimos 30 dias") sem novas
+chamadas à API e saber qual intervalo de tempo ainda não foi coletado.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from tools.dados import caminho_dados
+
+
+VAGAS_DB_PATH = caminho_dados("vagas.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vagas (
+    job_id TEXT PRIMARY KEY,
+    fingerprint INTEGER,
+    empresa TEXT,
+    titulo TEXT,
+    localizacao TEXT,
+    cidade TEXT,
+    salario_mensal REAL,
+    area TEXT NOT NULL,
+    consulta_local TEXT NOT NULL,
+    consulta TEXT,
+    coletado_em REAL NOT NULL,
+    visto_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vagas_area_local_visto ON vagas(area, consulta_local, visto_em);
+CREATE INDEX IF NOT EXISTS idx_vagas_cidade ON vagas(cidade);
+CREATE INDEX IF NOT EXISTS idx_vagas_visto_em ON vagas(visto_em);
+CREATE INDEX IF NOT EXISTS idx_vagas_fingerprint ON vagas(fingerprint);
+
+-- Cada (área, local) em que a vaga foi vista; a mesma vaga pode aparecer em várias consultas
+CREATE TABLE IF NOT EXISTS avistamentos (
+    job_id TEXT NOT NULL,
+    area TEXT NOT NULL,
+    consulta_local TEXT NOT NULL,
+    visto_em REAL NOT NULL,
+    PRIMARY KEY (job_id, area, consulta_local)
+);
+CREATE INDEX IF NOT EXISTS idx_avistamentos_area_local_visto ON avistamentos(area, consulta_local, visto_em);
+
+CREATE TABLE IF NOT EXISTS coletas (
+    area TEXT NOT NULL,
+    consulta_local TEXT NOT NULL,
+    coletado_em REAL NOT NULL,
+    PRIMARY KEY (area, consulta_local)
+);
+
+-- Frequência das consultas de demanda (inclui acertos de cache), lida pelo aquecedor de cache
+CREATE TABLE IF NOT EXISTS consultas (
+    area TEXT NOT NULL,
+    consulta_local TEXT NOT NULL,
+    area_original TEXT NOT NULL,
+    local_original TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    consultado_em REAL NOT NULL,
+    PRIMARY KEY (area, consulta_local)
+);
+"""
+
+
+def _normalizar(texto: str) -> str:
+    return texto.strip().lower()
+
+
+def _sqlite_int(valor: Optional[int]) -> Optional[int]:
+    """SQLite guarda inteiros com sinal de 64 bits; converte fingerprints unsigned."""
+    if valor is None:
+        return None
+    return valor - (1 << 64) if valor >= (1 << 63) else valor
+
+
+class VagasStore:
+    """
+    Store SQLite de vagas, deduplicado por job_id.
+    Os dados da vaga são gravados uma vez; cada (área, local) em que ela é
+    vista ganha um avistamento, e coletas posteriores atualizam `visto_em`.
+    """
+
+    def __init__(self, caminho: str = VAGAS_DB_PATH):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        if caminho != ":memory:":
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        # Uma conexão por store; o lock serializa o acesso entre threads
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            tabelas = {linha[0] for linha in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self._migrar()
+            self._conn.executescript(_SCHEMA)
+            if "vagas" in tabelas and "avistamentos" not in tabelas:
+                # Stores anteriores aos avistamentos: cada vaga foi vista só na consulta que a criou
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO avistamentos (job_id, area, consulta_local, visto_em) "
+                    "SELECT job_id, area, consulta_local, visto_em FROM vagas"
+                )
+
+    def _migrar(self) -> None:
+        """Adiciona colunas criadas depois da primeira versão do schema."""
+        colunas = {linha[1] for linha in self._conn.execute("PRAGMA table_info(vagas)")}
+        if colunas and "fingerprint" not in colunas:
+            self._conn.execute("ALTER TABLE vagas ADD COLUMN fingerprint INTEGER")
+
+    def registrar_vagas(
+        self,
+        vagas: List[Dict[str, Any]],
+        area: str,
+        local: str,
+        consulta: str = "",
+        coletado_em: Optional[float] = None,
+    ) -> int:
+        """
+        Persiste vagas já extraídas (job_id, fingerprint, empresa, titulo,
+        localizacao, cidade, salario_mensal) e marca a coleta de (área, local).
+
+        Returns:
+            int: quantidade de vagas novas (não vistas antes)
+        """
+        agora = coletado_em if coletado_em is not None else time.time()
+        area_n, local_n = _normalizar(area), _normalizar(local)
+        linhas = [
+            (
+                v["job_id"], _sqlite_int(v.get("fingerprint")), v.get("empresa"), v.get("titulo"),
+                v.get("localizacao"), v.get("cidade"), v.get("salario_mensal"),
+                area_n, local_n, consulta, agora, agora,
+            )
+            for v in vagas
+        ]
+        with self._lock, self._conn:
+            antes = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO vagas (job_id, fingerprint, empresa, titulo, localizacao, cidade, "
+                "salario_mensal, area, consulta_local, consulta, coletado_em, visto_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                linhas,
+            )
+            novas = self._conn.total_changes - antes
+            self._conn.executemany(
+                "UPDATE vagas SET visto_em = ? WHERE job_id = ?",
+                [(agora, linha[0]) for linha in linhas],
+            )
+            self._conn.executemany(
+                "INSERT INTO avistamentos (job_id, area, consulta_local, visto_em) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(job_id, area, consulta_local) DO UPDATE SET visto_em = excluded.visto_em",
+                [(linha[0], area_n, local_n, agora) for linha in linhas],
+            )
+            self._gravar_coleta(area_n, local_n, agora)
+        return novas
+
+    def marcar_coleta(self, area: str, local: str, coletado_em: Optional[float] = None) -> None:
+        """Marca uma coleta bem-sucedida de (área, local), mesmo sem vagas a gravar."""
+        agora = coletado_em if coletado_em is not None else time.time()
+        with self._lock, self._conn:
+            self._gravar_coleta(_normalizar(area), _normalizar(local), agora)
+
+    def _gravar_coleta(self, area_n: str, local_n: str, agora: float) -> None:
+        """Chamar com o lock, dentro da transação."""
+        self._conn.execute(
+            "INSERT INTO coletas (area, consulta_local, coletado_em) VALUES (?, ?, ?) "
+            "ON CONFLICT(area, consulta_local) DO UPDATE SET coletado_em = excluded.coletado_em",
+            (area_n, local_n, agora),
+        )
+
+    def registrar_consulta(self, area: str, local: str, consultado_em: Optional[float] = None) -> None:
+        """Conta uma consulta de demanda de (área, local), guardando a grafia mais recente."""
+        agora = consultado_em if consultado_em is not None else time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO consultas (area, consulta_local, area_original, local_original, total, consultado_em) "
+                "VALUES (?, ?, ?, ?, 1, ?) ON CONFLICT(area, consulta_local) DO UPDATE SET "
+                "total = total + 1, area_original = excluded.area_original, "
+                "local_original = excluded.local_original, consultado_em = excluded.consultado_em",
+                (_normalizar(area), _normalizar(local), area.strip(), local.strip(), agora),
+            )
+
+    def mais_consultadas(self, limite: int, desde: float = 0.0) -> List[Tuple[str, str]]:
+        """(área, local) mais consultados entre os consultados desde `desde`, com a grafia original."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT area_original, local_original FROM consultas WHERE consultado_em >= ? "
+                "ORDER BY total DESC, consultado_em DESC LIMIT ?",
+                (desde, limite),
+            ).fetchall()
+
+    def job_id_por_fingerprint(self, fingerprint: int) -> Optional[str]:
+        """job_id da primeira vaga gravada com o fingerprint, ou None."""
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT job_id FROM vagas WHERE fingerprint = ? ORDER BY coletado_em LIMIT 1",
+                (_sqlite_int(fingerprint),),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def ultima_coleta(self, area: str, local: str) -> Optional[float]:
+        """Instante (time.time) da última coleta de (área, local), ou None."""
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT coletado_em FROM coletas WHERE area = ? AND consulta_local = ?",
+                (_normalizar(area), _normalizar(local)),
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def consultar_janela(self, area: str, local: str, desde: float) -> List[Tuple[Optional[str], Optional[str], Optional[float]]]:
+        """
+        Retorna (empresa, cidade, salario_mensal) das vagas vistas em (área, local)
+        desde `desde`, uma linha por fingerprint (vagas republicadas com outro
+        job_id contam uma vez).
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT v.empresa, v.cidade, v.salario_mensal FROM avistamentos a "
+                "JOIN vagas v ON v.job_id = a.job_id "
+                "WHERE a.area = ? AND a.consulta_local = ? AND a.visto_em >= ? "
+                "GROUP BY COALESCE(v.fingerprint, v.job_id)",
+                (_normalizar(area), _normalizar(local), desde),
+            ).fetchall()
+
+
+_store: Optional[VagasStore] = None
+_store_lock = threading.Lock()
+
+
+def obter_store() -> VagasStore:
+    """Retorna o store do processo (caminho via VAGAS_DB_PATH no .env)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VagasStore(caminho_dados("vagas.db", "VAGAS_DB_PATH"))
+        return _store